@@ -99,7 +99,8 @@ def run_condition(label: str, genes: list, n_runs: int) -> list:
         seed = 42 + i   # deterministic seeds for reproducibility
         print(f"[{label}] Run {i+1}/{n_runs} (seed={seed}) ...")
 
-        m        = evaluate(genes, gui=False, verbose=False, seed=seed)
+        # Full horizon: a gridlock must count with all the wait it causes
+        m        = evaluate(genes, gui=False, verbose=False, seed=seed, stop_early=False)
         f        = fitness(m, alpha=ALPHA)
         avg_wait = m["total_wait"] / m["arrived_total"] if m["arrived_total"] > 0 else 0
 
@@ -0,0 +1,166 @@
+"""
+batch_eval.py
+TraCI-free evaluator for offline GA fitness.
+
+The GA never needs step-by-step control: the timing plan is fixed for
+the whole run. Instead of applying it over TraCI and polling every
+step, this evaluator
+  1. writes the candidate's plan as a <tlLogic> additional file
+     (same 4-phase layout and YELLOW as set_greens),
+  2. runs plain `sumo` with --summary-output and no TraCI connection,
+  3. stream-parses the summary into the metrics dict evaluate() returns.
+
+No socket, no per-step round-trips, no port. evaluate_batch() has the
+same signature and return value as eval_timings.evaluate(); select it
+for the GA with EVALUATOR=batch.
+"""
+
+import subprocess
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from config import SUMOCFG
+from eval_timings import (
+    TL_IDS, N_INTERSECTIONS,
+    sumo_args, phase_durations, fidelity_level, program_templates,
+)
+from net_info import config_inputs
+
+# programID of the generated programs. SUMO activates the program loaded
+# last, so the candidate's plan replaces the net file's default "0".
+PROGRAM_ID = "ga"
+
+
+def write_tls_additional(genes: list, path: Path):
+    """
+    Write the timing plan for genes as a SUMO additional file.
+
+    Phase states (which movements get green) come from the validated
+    program templates; only the durations come from the chromosome.
+    """
+    templates = program_templates()
+    lines     = ["<additional>"]
+    for i, tl_id in enumerate(TL_IDS):
+        template  = templates[tl_id]
+        durations = phase_durations(genes[i * 2], genes[i * 2 + 1])
+        lines.append(
+            f'    <tlLogic id="{tl_id}" type="{template["type"]}" '
+            f'programID="{PROGRAM_ID}" offset="{template["offset"]}">'
+        )
+        for duration, state in zip(durations, template["states"]):
+            lines.append(f'        <phase duration="{duration}" state="{state}"/>')
+        lines.append("    </tlLogic>")
+    lines.append("</additional>")
+    Path(path).write_text("\n".join(lines))
+
+
+def parse_summary(path: Path, step_len: float, trace_every: int = 0) -> dict:
+    """
+    Stream-parse a SUMO --summary-output file into evaluate()'s metrics.
+
+    Each <step> row describes the network after one simulation step:
+      halting  vehicles with speed < 0.1 m/s (= STOP_SPEED) -> total_wait
+      running  vehicles in the network
+      meanSpeed mean speed of the running vehicles          -> avg_speed
+      arrived  cumulative arrivals                          -> arrived_total
+
+    Args:
+        path:        summary file
+        step_len:    simulated seconds per step of the run
+        trace_every: record a trace row every trace_every steps (0 = off)
+    """
+    total_wait    = 0.0
+    total_speed   = 0.0
+    speed_samples = 0
+    arrived_total = 0
+    steps         = 0
+    trace         = []
+
+    for _, elem in ET.iterparse(path):
+        if elem.tag != "step":
+            continue
+        running = int(elem.get("running"))
+        total_wait += int(elem.get("halting")) * step_len
+        if running > 0:
+            # meanSpeed is -1 when the network is empty
+            total_speed   += float(elem.get("meanSpeed")) * running
+            speed_samples += running
+        arrived_total = int(elem.get("arrived"))
+        steps += 1
+        if trace_every and steps % trace_every == 0:
+            trace.append([
+                steps, running, int(elem.get("halting")),
+                arrived_total, round(total_wait, 2),
+            ])
+        elem.clear()
+
+    metrics = {
+        "steps_used":    steps,
+        "arrived_total": arrived_total,
+        "total_wait":    total_wait,
+        "avg_speed":     (total_speed / speed_samples) if speed_samples else 0.0,
+    }
+    if trace_every:
+        metrics["trace"] = trace
+    return metrics
+
+
+def evaluate_batch(
+    genes:       list,
+    gui:         bool = False,
+    verbose:     bool = False,
+    seed:        int  = None,
+    port:        int  = None,
+    fidelity:    str  = "full",
+    trace_every: int  = 0,
+) -> dict:
+    """
+    Drop-in replacement for eval_timings.evaluate() without TraCI.
+
+    Always simulates from an empty network (warm-start snapshots need
+    TraCI to apply the plan after loading the state). `port` is
+    accepted for signature compatibility and ignored.
+
+    Returns:
+        dict with the same keys as evaluate():
+        genes, steps_used, arrived_total, total_wait, avg_speed,
+        trace (trace_every > 0 only), fidelity, wall_time
+    """
+    assert len(genes) == N_INTERSECTIONS * 2, \
+        f"Expected {N_INTERSECTIONS * 2} genes, got {len(genes)}"
+
+    level = fidelity_level(fidelity)
+    t0    = time.perf_counter()
+
+    with tempfile.TemporaryDirectory(prefix="uto_batch_") as tmp:
+        tmp        = Path(tmp)
+        additional = tmp / "plan.add.xml"
+        summary    = tmp / "summary.xml"
+        write_tls_additional(genes, additional)
+
+        # Keep any additional files the sumocfg already loads
+        extra = [str(p) for p in config_inputs(SUMOCFG).get("additional-files", [])]
+        cmd = ["sumo-gui" if gui else "sumo"] + sumo_args(
+            seed=seed, fidelity=fidelity, extra_args=[
+                "--additional-files", ",".join(extra + [str(additional)]),
+                "--summary-output",   str(summary),
+                "--end",              str(level["max_steps"] * level["step_len"]),
+                "--no-step-log",
+            ],
+        )
+        subprocess.run(
+            cmd, check=True,
+            stdout=None if verbose else subprocess.DEVNULL,
+        )
+        metrics = parse_summary(summary, level["step_len"], trace_every=trace_every)
+
+    if verbose:
+        print(f"[Batch] steps {metrics['steps_used']}  arrived {metrics['arrived_total']}")
+    return {
+        "genes":     list(genes),
+        **metrics,
+        "fidelity":  fidelity,
+        "wall_time": time.perf_counter() - t0,
+    }
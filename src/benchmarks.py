@@ -0,0 +1,231 @@
+"""
+benchmarks.py
+Measurements that back the performance options in config.py.
+Each benchmark prints a summary and appends its rows to benchmarks.csv
+(benchmark, network, variant, metric, value) for the current SUMO_MAP.
+
+Usage:
+    py src/benchmarks.py overhead          # relaunch vs reload per candidate
+    py src/benchmarks.py fidelity          # cost + rank correlation per level
+    py src/benchmarks.py convergence       # GA convergence per ENCODING
+    py src/benchmarks.py report            # overhead table (Markdown)
+
+Run once per network, then print the table:
+    $env:SUMO_MAP = "generated"; py src/benchmarks.py overhead
+    $env:SUMO_MAP = "grid20";    py src/benchmarks.py overhead
+    py src/benchmarks.py report
+"""
+
+import csv
+import sys
+import time
+import multiprocessing
+
+import numpy as np
+from scipy import stats
+
+from config import (
+    SUMO_MAP, BASELINE_PHASE, BENCHMARK_CSV, ALPHA,
+    GREEN_MIN, GREEN_MAX, FIDELITY_LEVELS, POP_SIZE,
+)
+from eval_timings import (
+    TL_IDS, N_INTERSECTIONS, fitness,
+    start_sumo, open_sumo, close_sumo, shutdown_sumo, set_greens,
+)
+from worker_pool import start_pool, evaluate_population, close_pool
+from ports import lease_port, release_port
+from chromosome import ENCODINGS, n_genes
+from ga_ops import make_offspring, KEEP_ELITISM
+
+
+def write_rows(benchmark: str, rows: list):
+    """Append (variant, metric, value) rows for this benchmark and network."""
+    file_exists = BENCHMARK_CSV.exists()
+    with open(BENCHMARK_CSV, "a", newline="") as f:
+        writer = csv.writer(f)
+        if not file_exists:
+            writer.writerow(["benchmark", "network", "variant", "metric", "value"])
+        for variant, metric, value in rows:
+            writer.writerow([benchmark, SUMO_MAP, variant, metric, value])
+
+
+# ============================================================
+# PER-CANDIDATE OVERHEAD
+# ============================================================
+
+def bench_overhead(n_candidates: int = 10):
+    """
+    Time the fixed per-candidate cost (everything except stepping):
+      relaunch — start_sumo + set_greens + close   (fresh process per candidate)
+      reload   — load()     + set_greens          (persistent worker)
+    """
+    port  = lease_port()
+    label = str(port)
+    plan  = {tl_id: (BASELINE_PHASE, BASELINE_PHASE) for tl_id in TL_IDS}
+
+    t0 = time.perf_counter()
+    for _ in range(n_candidates):
+        start_sumo(port=port)
+        set_greens(plan, label=label)
+        close_sumo(label)
+    relaunch = (time.perf_counter() - t0) / n_candidates
+
+    open_sumo(port=port, persistent=True)   # first launch is not timed
+    t0 = time.perf_counter()
+    for _ in range(n_candidates):
+        open_sumo(port=port, persistent=True)
+        set_greens(plan, label=label)
+    reload = (time.perf_counter() - t0) / n_candidates
+    shutdown_sumo()
+    release_port(port)
+
+    reduction = 100.0 * (1 - reload / relaunch) if relaunch else 0.0
+    print(f"[Bench] {SUMO_MAP} ({N_INTERSECTIONS} intersections), {n_candidates} candidates")
+    print(f"  relaunch: {relaunch * 1000:.1f} ms/candidate")
+    print(f"  reload:   {reload * 1000:.1f} ms/candidate")
+    print(f"  overhead reduction: {reduction:.1f}%")
+    write_rows("overhead", [
+        ("relaunch", "seconds_per_candidate", relaunch),
+        ("reload",   "seconds_per_candidate", reload),
+        ("reload",   "reduction_pct",         reduction),
+    ])
+
+
+# ============================================================
+# FIDELITY LEVELS
+# ============================================================
+
+def random_population(n: int, seed: int = 0) -> list:
+    """n random chromosomes in [GREEN_MIN, GREEN_MAX], reproducible."""
+    rng = np.random.default_rng(seed)
+    return rng.integers(GREEN_MIN, GREEN_MAX + 1, size=(n, N_INTERSECTIONS * 2)).tolist()
+
+
+def bench_fidelity(n_candidates: int = 24):
+    """
+    Evaluate the same random chromosomes at every fidelity level and
+    record, per level:
+      seconds_per_candidate — mean wall time of one evaluation
+      spearman_vs_full      — rank correlation of fitness with "full"
+    A good screening level is much cheaper than "full" with high rho.
+    """
+    population = random_population(n_candidates)
+    start_pool(min(n_candidates, multiprocessing.cpu_count()))
+    try:
+        fits, costs = {}, {}
+        for name in FIDELITY_LEVELS:
+            results     = evaluate_population(
+                population, {"fidelity": name, "encoding": "independent"}
+            )
+            fits[name]  = [fitness(m, alpha=ALPHA) for m in results]
+            costs[name] = sum(m["wall_time"] for m in results) / len(results)
+    finally:
+        close_pool()
+
+    rows = []
+    print(f"[Bench] {SUMO_MAP}: {n_candidates} candidates per level")
+    for name in FIDELITY_LEVELS:
+        rho = stats.spearmanr(fits[name], fits["full"])[0]
+        print(f"  {name:<8} {costs[name]:8.2f} s/candidate   rho vs full = {rho:.3f}")
+        rows.append((name, "seconds_per_candidate", costs[name]))
+        rows.append((name, "spearman_vs_full",      rho))
+    write_rows("fidelity", rows)
+
+
+# ============================================================
+# ENCODING CONVERGENCE
+# ============================================================
+
+def bench_convergence(generations: int = 10):
+    """
+    Run the same small GA (ga_ops operators, POP_SIZE, KEEP_ELITISM
+    elites, same random seed) under every encoding and record, per
+    encoding:
+      genes                 — chromosome length
+      best_gen{g}           — best fitness after generation g
+      evaluations_to_target — evaluations until the best first reached
+                              the lowest final best of all encodings
+    Fewer genes should reach the target in fewer evaluations; the final
+    best shows what tying the genes costs in attainable fitness.
+    """
+    def score(pop: np.ndarray, encoding: str) -> np.ndarray:
+        batch = evaluate_population(pop.tolist(), {"encoding": encoding})
+        return np.array([fitness(m, alpha=ALPHA) for m in batch])
+
+    curves = {}
+    start_pool(min(POP_SIZE, multiprocessing.cpu_count()))
+    try:
+        for name in ENCODINGS:
+            rng  = np.random.default_rng(0)
+            pop  = rng.integers(GREEN_MIN, GREEN_MAX + 1, size=(POP_SIZE, n_genes(name)))
+            fit  = score(pop, name)
+            best = [float(fit.max())]
+            for _ in range(generations):
+                elites   = np.argsort(-fit)[:KEEP_ELITISM]
+                children = np.array([make_offspring(pop, fit, rng)
+                                     for _ in range(POP_SIZE - KEEP_ELITISM)])
+                pop  = np.vstack([pop[elites], children])
+                fit  = np.concatenate([fit[elites], score(children, name)])
+                best.append(float(fit.max()))
+            curves[name] = best
+    finally:
+        close_pool()
+
+    # Evaluations after generation g: the initial population, then
+    # POP_SIZE - KEEP_ELITISM offspring per generation
+    evals  = [POP_SIZE + g * (POP_SIZE - KEEP_ELITISM) for g in range(generations + 1)]
+    target = min(best[-1] for best in curves.values())
+
+    rows = []
+    print(f"[Bench] {SUMO_MAP}: {generations} generations of {POP_SIZE}, "
+          f"target fitness {target:.2f}")
+    for name, best in curves.items():
+        reached = next(e for e, b in zip(evals, best) if b >= target)
+        print(f"  {name:<12} {n_genes(name):3d} genes   final {best[-1]:10.2f}   "
+              f"target after {reached} evaluations")
+        rows.append((name, "genes", n_genes(name)))
+        rows += [(name, f"best_gen{g}", b) for g, b in enumerate(best)]
+        rows.append((name, "evaluations_to_target", reached))
+    write_rows("convergence", rows)
+
+
+# ============================================================
+# REPORT
+# ============================================================
+
+def report_overhead():
+    """
+    Print the latest overhead measurement of every network in
+    benchmarks.csv as a Markdown table.
+    """
+    if not BENCHMARK_CSV.exists():
+        sys.exit(f"No {BENCHMARK_CSV.name} yet — run the overhead benchmark first.")
+    latest = {}   # network -> {(variant, metric): value}, later rows win
+    with open(BENCHMARK_CSV, newline="") as f:
+        for row in csv.DictReader(f):
+            if row["benchmark"] == "overhead":
+                latest.setdefault(row["network"], {})[(row["variant"], row["metric"])] = \
+                    float(row["value"])
+
+    print("| Network | Relaunch (s/candidate) | Reload (s/candidate) | Reduction |")
+    print("|---|---|---|---|")
+    for network, m in latest.items():
+        print(f"| `{network}` | {m[('relaunch', 'seconds_per_candidate')]:.3f} "
+              f"| {m[('reload', 'seconds_per_candidate')]:.3f} "
+              f"| {m[('reload', 'reduction_pct')]:.1f}% |")
+
+
+BENCHMARKS = {
+    "overhead":    bench_overhead,
+    "fidelity":    bench_fidelity,
+    "convergence": bench_convergence,
+    "report":      report_overhead,
+}
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    name = sys.argv[1] if len(sys.argv) > 1 else ""
+    if name not in BENCHMARKS:
+        sys.exit(f"Usage: py src/benchmarks.py [{' | '.join(BENCHMARKS)}]")
+    BENCHMARKS[name]()
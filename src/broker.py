@@ -0,0 +1,428 @@
+"""
+broker.py
+Multi-host distributed evaluation over TCP (BROKER=1).
+
+The optimizer process becomes a broker: instead of the local worker
+pool, tasks (task id, genes, opts incl. seed) go to agents that may
+run on any host. Each agent evaluates them on its own local worker
+pool (worker_pool.py, `slots` processes) and streams results back.
+worker_pool.py routes to the broker transparently, so every
+OPTIMIZER mode runs distributed unchanged.
+
+  - Protocol: one JSON object per line, both directions
+      agent  -> broker  hello (name, slots, token, scenario), result, error, heartbeat
+      broker -> agent   task, shutdown, rejected (reason)
+  - The hello must arrive within HEARTBEAT_TIMEOUT, carry BROKER_TOKEN
+    and the broker's scenario fingerprint (network files plus the
+    result-shaping settings, eval_cache.scenario_fingerprint): an agent
+    on a stale checkout or another network would return metrics of a
+    different scenario, so it is turned away
+  - Each agent gets at most `slots` tasks at a time
+  - Agents send a heartbeat every BROKER_HEARTBEAT seconds; an agent
+    silent for 3 intervals, or whose connection drops, is declared
+    lost and its in-flight tasks are re-dispatched (up to
+    BROKER_MAX_ATTEMPTS dispatches per task)
+  - Per-agent throughput (tasks, simulated seconds, tasks/min) is
+    printed whenever an agent leaves and when the broker stops
+
+Usage:
+    # Broker: any optimizer run with BROKER=1. It listens on loopback
+    # only unless BROKER_HOST says otherwise, which needs a BROKER_TOKEN
+    $env:BROKER = "1"; $env:BROKER_HOST = "0.0.0.0"; $env:BROKER_TOKEN = "secret"
+    py src/pygad_optimizer.py
+
+    # Agent, on every worker host (same BROKER_TOKEN)
+    py src/broker.py agent --host <broker host> --slots 16
+
+    # Local test: broker plus 3 single-slot agents on this machine
+    $env:BROKER = "1"; $env:BROKER_LOCAL_AGENTS = "3"; py src/pygad_optimizer.py
+"""
+
+import sys
+import hmac
+import json
+import time
+import queue
+import socket
+import argparse
+import ipaddress
+import threading
+import subprocess
+from collections import deque
+
+from config import (
+    BROKER_HOST, BROKER_PORT, BROKER_TOKEN, BROKER_HEARTBEAT,
+    BROKER_LOCAL_AGENTS, BROKER_MAX_ATTEMPTS,
+)
+from eval_cache import scenario_fingerprint
+
+HEARTBEAT_TIMEOUT = 3 * BROKER_HEARTBEAT
+
+
+def _send(sock: socket.socket, lock: threading.Lock, msg: dict):
+    """Write one JSON line; the lock keeps concurrent writers' lines whole."""
+    data = (json.dumps(msg) + "\n").encode()
+    with lock:
+        sock.sendall(data)
+
+
+# ============================================================
+# BROKER SIDE (optimizer process)
+# ============================================================
+
+_lock     = threading.Lock()
+_queue    = deque()   # task ids waiting for a free agent slot
+_tasks    = {}        # task id -> idx, genes, opts, callbacks, attempts, agent
+_agents   = {}        # agent name -> socket, slots, in-flight ids, stats
+_stats    = []        # final stats of agents that left
+_local    = []        # local agent processes (BROKER_LOCAL_AGENTS)
+_server   = None
+_scenario = None      # scenario_fingerprint() agents must match
+_next_id  = 0
+_running  = threading.Event()
+
+
+def _is_loopback(host: str) -> bool:
+    """True if host resolves to a loopback address (0.0.0.0 does not)."""
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        pass   # a host name
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+def start_broker():
+    """
+    Listen for agents (and launch local ones if configured).
+
+    Anyone who can reach the port and knows the token can take tasks
+    and feed results in, so binding beyond loopback needs BROKER_TOKEN.
+    """
+    global _server, _scenario
+    if not BROKER_TOKEN and not _is_loopback(BROKER_HOST):
+        raise ValueError(
+            f"BROKER_HOST={BROKER_HOST} accepts remote agents but BROKER_TOKEN "
+            f"is empty. Set BROKER_TOKEN (agents need the same value) or "
+            f"bind to 127.0.0.1."
+        )
+    _scenario = scenario_fingerprint()
+    _server   = socket.create_server((BROKER_HOST, BROKER_PORT))
+    _server.settimeout(1.0)
+    _running.set()
+    threading.Thread(target=_accept_loop, daemon=True).start()
+    threading.Thread(target=_monitor_loop, daemon=True).start()
+    print(f"[Broker] listening on {BROKER_HOST}:{BROKER_PORT}")
+
+    for i in range(BROKER_LOCAL_AGENTS):
+        _local.append(subprocess.Popen([
+            sys.executable, __file__, "agent",
+            "--host", "127.0.0.1", "--port", str(BROKER_PORT),
+            "--slots", "1", "--name", f"local{i}",
+        ]))
+
+
+def stop_broker():
+    """Tell every agent to shut down, stop listening, print the stats."""
+    _running.clear()
+    with _lock:
+        agents = list(_agents.values())
+    for agent in agents:
+        try:
+            _send(agent["sock"], agent["send_lock"], {"type": "shutdown"})
+        except OSError:
+            pass
+        _drop(agent["name"], "broker stopped", requeue=False)
+    _server.close()
+    for proc in _local:
+        proc.wait(timeout=60)
+    _local.clear()
+    print_stats()
+
+
+def submit(idx: int, genes: list, opts: dict, on_done, on_error):
+    """
+    Queue one task. on_done((idx, metrics)) or on_error(exception) is
+    called from a broker thread when it completes (worker_pool.submit
+    semantics).
+    """
+    global _next_id
+    with _lock:
+        tid, _next_id = _next_id, _next_id + 1
+        _tasks[tid] = {
+            "idx": idx, "genes": list(genes), "opts": opts or {},
+            "on_done": on_done, "on_error": on_error,
+            "attempts": 0, "agent": None,
+        }
+        _queue.append(tid)
+    _dispatch()
+
+
+def iter_tasks(tasks: list):
+    """Run (idx, genes, opts) tasks on the agents; yield (idx, metrics) as they finish."""
+    done = queue.Queue()
+    for idx, genes, opts in tasks:
+        submit(idx, genes, opts, done.put, done.put)
+    for _ in tasks:
+        item = done.get()
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+
+
+def stats() -> list:
+    """Throughput of every agent seen so far (connected ones first)."""
+    now = time.time()
+    with _lock:
+        live = [dict(a["stats"], until=now) for a in _agents.values()]
+    rows = []
+    for s in live + _stats:
+        minutes = max(s["until"] - s["joined"], 1e-9) / 60
+        rows.append({
+            "agent":       s["name"],
+            "slots":       s["slots"],
+            "tasks":       s["tasks"],
+            "sim_seconds": s["sim_seconds"],
+            "tasks_min":   s["tasks"] / minutes,
+        })
+    return rows
+
+
+def print_stats():
+    """Print the per-agent throughput table."""
+    rows = stats()
+    if not rows:
+        return
+    print(f"[Broker] {'agent':<24} {'slots':>5} {'tasks':>6} {'sim s':>9} {'tasks/min':>9}")
+    for r in rows:
+        print(f"[Broker] {r['agent']:<24} {r['slots']:>5} {r['tasks']:>6} "
+              f"{r['sim_seconds']:>9.0f} {r['tasks_min']:>9.2f}")
+
+
+def _accept_loop():
+    """Accept agent connections until the broker stops."""
+    while _running.is_set():
+        try:
+            sock, addr = _server.accept()
+        except socket.timeout:
+            continue
+        except OSError:
+            return
+        threading.Thread(target=_serve_agent, args=(sock, addr), daemon=True).start()
+
+
+def _serve_agent(sock: socket.socket, addr: tuple):
+    """Register one agent, then read its results until it disconnects."""
+    reader = sock.makefile("r", encoding="utf-8")
+    # A connection that never says hello must not hold this thread
+    sock.settimeout(HEARTBEAT_TIMEOUT)
+    try:
+        hello = json.loads(reader.readline() or "{}")
+    except (OSError, ValueError):
+        hello = {}
+    sock.settimeout(None)
+
+    if hello.get("type") != "hello" or not hmac.compare_digest(
+            str(hello.get("token", "")).encode(), BROKER_TOKEN.encode()):
+        print(f"[Broker] rejected connection from {addr[0]}:{addr[1]}")
+        sock.close()
+        return
+    if hello.get("scenario") != _scenario:
+        print(f"[Broker] rejected agent {hello.get('name', 'agent')}@{addr[0]}:{addr[1]}: "
+              f"different network or simulation settings")
+        try:
+            _send(sock, threading.Lock(), {"type": "rejected", "reason": "scenario mismatch"})
+        except OSError:
+            pass
+        sock.close()
+        return
+
+    name  = f"{hello.get('name', 'agent')}@{addr[0]}:{addr[1]}"
+    agent = {
+        "name":      name,
+        "sock":      sock,
+        "send_lock": threading.Lock(),
+        "slots":     max(1, int(hello.get("slots", 1))),
+        "inflight":  set(),
+        "last_seen": time.time(),
+        "stats":     {"name": name, "slots": int(hello.get("slots", 1)),
+                      "tasks": 0, "sim_seconds": 0.0, "joined": time.time()},
+    }
+    with _lock:
+        _agents[name] = agent
+    print(f"[Broker] agent {name} joined with {agent['slots']} slots")
+    _dispatch()
+
+    reason = "disconnected"
+    try:
+        for line in reader:
+            msg = json.loads(line)
+            agent["last_seen"] = time.time()
+            if msg["type"] == "result":
+                _finish(agent, msg["task"], metrics=msg["metrics"])
+            elif msg["type"] == "error":
+                _finish(agent, msg["task"], error=msg["error"])
+    except (OSError, ValueError) as e:
+        reason = str(e) or type(e).__name__
+    _drop(name, reason)
+
+
+def _monitor_loop():
+    """Declare agents lost once their heartbeats stop."""
+    while _running.is_set():
+        time.sleep(1.0)
+        now = time.time()
+        with _lock:
+            silent = [n for n, a in _agents.items() if now - a["last_seen"] > HEARTBEAT_TIMEOUT]
+        for name in silent:
+            _drop(name, f"no heartbeat for {HEARTBEAT_TIMEOUT:.0f}s")
+
+
+def _dispatch():
+    """Hand queued tasks to agents with free slots."""
+    sends = []
+    with _lock:
+        for agent in _agents.values():
+            while _queue and len(agent["inflight"]) < agent["slots"]:
+                tid  = _queue.popleft()
+                task = _tasks[tid]
+                task["agent"]     = agent["name"]
+                task["attempts"] += 1
+                agent["inflight"].add(tid)
+                sends.append((agent, {
+                    "type": "task", "task": tid,
+                    "genes": task["genes"], "opts": task["opts"],
+                }))
+    # Sockets are written outside the lock: a slow agent must not
+    # stall results arriving from the others
+    for agent, msg in sends:
+        try:
+            _send(agent["sock"], agent["send_lock"], msg)
+        except OSError as e:
+            _drop(agent["name"], f"send failed: {e}")
+
+
+def _finish(agent: dict, tid: int, metrics: dict = None, error: str = None):
+    """Complete a task reported by an agent and run its callback."""
+    with _lock:
+        agent["inflight"].discard(tid)
+        task = _tasks.get(tid)
+        # Stale report: the task was re-dispatched and finished elsewhere
+        if task is None or task["agent"] != agent["name"]:
+            task = None
+        else:
+            del _tasks[tid]
+            if metrics is not None:
+                agent["stats"]["tasks"]       += 1
+                agent["stats"]["sim_seconds"] += metrics.get("wall_time", 0.0)
+    if task is not None:
+        if error is None:
+            task["on_done"]((task["idx"], metrics))
+        else:
+            task["on_error"](RuntimeError(f"task {tid} failed on {agent['name']}: {error}"))
+    _dispatch()
+
+
+def _drop(name: str, reason: str, requeue: bool = True):
+    """Forget a lost agent and re-dispatch the tasks it was running."""
+    failed = []
+    with _lock:
+        agent = _agents.pop(name, None)
+        if agent is None:
+            return
+        for tid in agent["inflight"]:
+            task = _tasks.get(tid)
+            if task is None:
+                continue
+            if not requeue or task["attempts"] >= BROKER_MAX_ATTEMPTS:
+                failed.append((tid, _tasks.pop(tid)))
+            else:
+                _queue.appendleft(tid)
+        _stats.append(dict(agent["stats"], until=time.time()))
+    try:
+        agent["sock"].shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    agent["sock"].close()
+
+    if _running.is_set():
+        print(f"[Broker] agent {name} lost ({reason}): "
+              f"{len(agent['inflight']) - len(failed)} tasks re-dispatched")
+        print_stats()
+    for tid, task in failed:
+        task["on_error"](RuntimeError(f"task {tid} lost with {name} ({reason})"))
+    _dispatch()
+
+
+# ============================================================
+# AGENT SIDE (any host)
+# ============================================================
+
+def run_agent(host: str, port: int, slots: int, name: str):
+    """
+    Connect to the broker and evaluate its tasks on a local worker pool
+    of `slots` processes until the broker shuts down or disconnects.
+    """
+    # Imported here: only agents run simulations
+    from worker_pool import start_pool, submit as submit_local, close_pool
+
+    sock      = socket.create_connection((host, port))
+    send_lock = threading.Lock()
+    stop      = threading.Event()
+
+    def send(msg: dict):
+        try:
+            _send(sock, send_lock, msg)
+        except OSError:
+            stop.set()
+
+    def heartbeat():
+        while not stop.wait(BROKER_HEARTBEAT):
+            send({"type": "heartbeat"})
+
+    send({"type": "hello", "name": name, "slots": slots, "token": BROKER_TOKEN,
+          "scenario": scenario_fingerprint()})
+    start_pool(slots, use_broker=False)
+    threading.Thread(target=heartbeat, daemon=True).start()
+    print(f"[Agent] {name}: connected to {host}:{port} with {slots} slots")
+
+    def on_done(item):
+        tid, metrics = item
+        send({"type": "result", "task": tid, "metrics": metrics})
+
+    try:
+        for line in sock.makefile("r", encoding="utf-8"):
+            msg = json.loads(line)
+            if msg["type"] == "shutdown":
+                break
+            if msg["type"] == "rejected":
+                print(f"[Agent] {name}: rejected by the broker ({msg['reason']}) — "
+                      f"check that its network files and config match this host's")
+                break
+            if msg["type"] == "task":
+                tid = msg["task"]
+                submit_local(
+                    tid, msg["genes"], msg["opts"], on_done,
+                    lambda e, tid=tid: send({"type": "error", "task": tid, "error": repr(e)}),
+                )
+    finally:
+        stop.set()
+        close_pool()
+        sock.close()
+        print(f"[Agent] {name}: disconnected")
+
+
+if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(description="Distributed SUMO evaluation agent")
+    parser.add_argument("role", choices=["agent"])
+    parser.add_argument("--host",  default="127.0.0.1")
+    parser.add_argument("--port",  type=int, default=BROKER_PORT)
+    parser.add_argument("--slots", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--name",  default=socket.gethostname())
+    args = parser.parse_args()
+    run_agent(args.host, args.port, args.slots, args.name)
@@ -0,0 +1,93 @@
+"""
+chromosome.py
+Chromosome layout and alternative encodings of the timing plan.
+
+The simulation side always takes the full layout — two greens per
+intersection, in TL_IDS order:
+    gene[2i] = phase A (north-south) green of TL_IDS[i]
+    gene[2i+1] = phase B (east-west) green of TL_IDS[i]
+The optimizers can search a smaller space instead (ENCODING); workers
+decode each chromosome to the full layout before simulating, so
+set_greens(), the evaluation cache and ga_history.csv are unchanged.
+
+Encodings (N = intersections):
+  - "independent" — 2N genes, the full layout (original)
+  - "cycle_split" — N + 1 genes: one shared cycle gene c (total green
+                    2c, as in a coordinated grid) and one split gene per
+                    intersection, its position in [GREEN_MIN, GREEN_MAX]
+                    giving phase A's share of the total
+  - "rows"        — 2 * ROWS genes: (gA, gB) shared by every
+                    intersection of a row corridor
+  - "corridor"    — COLS + ROWS genes: north-south green per column
+                    corridor, east-west green per row corridor
+
+Every encoded gene lives in [GREEN_MIN, GREEN_MAX], so the operators and
+gene spaces of every optimizer work unchanged; decoded greens are
+clamped to the same range.
+"""
+
+from config import COLS, ROWS, GREEN_MIN, GREEN_MAX, ENCODING
+
+# TL_IDS: ordered list of all traffic light junction IDs.
+# Order defines the chromosome layout:
+#   gene[0]=J_0_0 phase A, gene[1]=J_0_0 phase B,
+#   gene[2]=J_0_1 phase A, gene[3]=J_0_1 phase B, ... etc.
+# TL_IDS[i] is column i // ROWS, row i % ROWS.
+TL_IDS          = [f"J_{col}_{row}" for col in range(COLS) for row in range(ROWS)]
+N_INTERSECTIONS = len(TL_IDS)
+
+ENCODINGS = {
+    "independent": 2 * N_INTERSECTIONS,
+    "cycle_split": N_INTERSECTIONS + 1,
+    "rows":        2 * ROWS,
+    "corridor":    COLS + ROWS,
+}
+
+
+def _clamp(green: float) -> int:
+    """Round a green time into [GREEN_MIN, GREEN_MAX]."""
+    return int(min(max(round(green), GREEN_MIN), GREEN_MAX))
+
+
+def n_genes(encoding: str = ENCODING) -> int:
+    """Chromosome length under an encoding."""
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown ENCODING '{encoding}'. Options: {', '.join(ENCODINGS)}")
+    return ENCODINGS[encoding]
+
+
+def decode(genes: list, encoding: str = ENCODING) -> list:
+    """
+    Expand an encoded chromosome to the full layout.
+
+    Args:
+        genes:    n_genes(encoding) integers in [GREEN_MIN, GREEN_MAX]
+        encoding: ENCODINGS key
+
+    Returns:
+        flat list of 2 * N_INTERSECTIONS greens, in TL_IDS order
+    """
+    assert len(genes) == n_genes(encoding), \
+        f"Expected {n_genes(encoding)} genes for '{encoding}', got {len(genes)}"
+
+    if encoding == "independent":
+        return [int(g) for g in genes]
+
+    full = []
+    for i in range(N_INTERSECTIONS):
+        col, row = divmod(i, ROWS)
+        if encoding == "cycle_split":
+            total = 2 * genes[0]
+            share = (genes[1 + i] - GREEN_MIN) / (GREEN_MAX - GREEN_MIN)
+            g_a   = _clamp(total * share)
+            full += [g_a, _clamp(total - g_a)]
+        elif encoding == "rows":
+            full += [int(genes[2 * row]), int(genes[2 * row + 1])]
+        else:   # corridor
+            full += [int(genes[col]), int(genes[COLS + row])]
+    return full
+
+
+def to_phases(full: list) -> dict:
+    """Full-layout chromosome to the phases_dict set_greens() consumes."""
+    return {tl_id: (full[i * 2], full[i * 2 + 1]) for i, tl_id in enumerate(TL_IDS)}
@@ -0,0 +1,161 @@
+"""
+coevolution.py
+Cooperative coevolution over intersection subgroups (OPTIMIZER=coevolution).
+
+The chromosome grows as 2 * N_INTERSECTIONS genes; one population of
+POP_SIZE does not converge on a city-scale network in GENERATIONS.
+Here the search is decomposed:
+  - TL_IDS is split into spatial subgroups, the rows or columns of the
+    grid (COEVO_GROUPING); each subgroup's genes evolve in their own
+    subpopulation of POP_SIZE with the ga_ops operators
+  - a subgroup's candidate is scored inside the context: the best full
+    chromosome found so far, i.e. the best collaborators from every
+    other subgroup
+  - every generation, the candidates of all subgroups go to the worker
+    pool as ONE batch; the best result becomes the new context
+  - elites are re-scored against the new context — free for the
+    subgroups whose context did not change (score_population serves
+    chromosomes already in `results`)
+
+All subgroups feed one ga_history.csv (one row per generation, the
+context) and one checkpoint holding every candidate as the full
+chromosome it was scored as, its fitness, and the context after that
+generation; a resume continues from them without simulating anything.
+"""
+
+import multiprocessing
+
+import numpy as np
+
+from config import POP_SIZE, GENERATIONS, SEEDS, COEVO_GROUPING, ENCODING
+from eval_timings import TL_IDS
+from worker_pool import start_pool, close_pool
+from ga_ops import random_population, make_offspring, KEEP_ELITISM
+from pygad_optimizer import (
+    N_GENES, results, score_population, log_generation, reset_logs,
+    prepare_simulations, save_checkpoint, load_checkpoint, restore_rngs, finish_run,
+)
+
+MODE = "coevolution"
+
+
+def subgroups(by: str = COEVO_GROUPING) -> list:
+    """
+    Split TL_IDS (J_<col>_<row>) into the rows or columns of the grid.
+
+    Returns:
+        one list of indices into TL_IDS per subgroup
+    """
+    if by not in ("rows", "cols"):
+        raise ValueError(f"Unknown COEVO_GROUPING '{by}'. Options: rows, cols")
+    part   = 2 if by == "rows" else 1
+    groups = {}
+    for i, tl_id in enumerate(TL_IDS):
+        groups.setdefault(tl_id.split("_")[part], []).append(i)
+    return list(groups.values())
+
+
+def _assemble(context: np.ndarray, gene_idx: list, members: np.ndarray) -> np.ndarray:
+    """Full chromosomes: the context with one subgroup's genes replaced by each member's."""
+    full = np.tile(context, (len(members), 1))
+    full[:, gene_idx] = members
+    return full
+
+
+def run_coevolution():
+    """Run cooperative coevolution, with checkpoint/resume."""
+    if ENCODING != "independent":
+        raise ValueError("OPTIMIZER=coevolution splits per-intersection genes; "
+                         f"it needs ENCODING=independent, not '{ENCODING}'")
+    groups    = subgroups()
+    gene_idx  = [[g for i in group for g in (2 * i, 2 * i + 1)] for group in groups]
+    n_groups  = len(groups)
+    n_workers = min(n_groups * POP_SIZE * len(SEEDS), multiprocessing.cpu_count())
+    rng       = np.random.default_rng()
+
+    checkpoint = load_checkpoint(MODE)
+    if checkpoint is not None and checkpoint.get("grouping") != COEVO_GROUPING:
+        print(f"[Checkpoint] Saved with '{checkpoint.get('grouping')}' subgroups, "
+              f"running '{COEVO_GROUPING}'. Starting fresh.")
+        checkpoint = None
+    if checkpoint is not None:
+        completed = checkpoint["generation"]
+        if completed >= GENERATIONS:
+            print("[Checkpoint] Run already completed. Delete checkpoints/checkpoint.json to start fresh.")
+            return
+        flat     = np.asarray(checkpoint["population"], dtype=int)
+        full     = [flat[k * POP_SIZE:(k + 1) * POP_SIZE] for k in range(n_groups)]
+        context  = np.asarray(checkpoint["context"], dtype=int)
+        restore_rngs(checkpoint, {"ops": rng})
+        subpops  = [pop[:, idx] for pop, idx in zip(full, gene_idx)]
+        if checkpoint.get("fitness") is not None:   # None: generation 0, not scored yet
+            fits     = np.asarray(checkpoint["fitness"], dtype=float).reshape(n_groups, POP_SIZE)
+            best_fit = checkpoint["best_fitness"]
+        print(f"[Config] Resuming from gen {completed} — "
+              f"{GENERATIONS - completed} generations remaining")
+    else:
+        completed = 0
+        context   = random_population(1, N_GENES, rng)[0]
+        subpops   = [random_population(POP_SIZE, len(idx), rng) for idx in gene_idx]
+        reset_logs()
+        # Checkpoint generation 0 before anything is simulated: a crash
+        # while scoring it resumes these subpopulations and the journal
+        # replays the evaluations already finished
+        save_checkpoint(
+            generation   = 0,
+            population   = np.vstack([_assemble(context, idx, pop)
+                                      for idx, pop in zip(gene_idx, subpops)]).tolist(),
+            best_fitness = float("-inf"),
+            extra        = {"optimizer": MODE, "grouping": COEVO_GROUPING,
+                            "context": [int(g) for g in context]},
+            rngs         = {"ops": rng},
+        )
+    print(f"[Config] Coevolution: {n_groups} subgroups ({COEVO_GROUPING}) x {POP_SIZE}  "
+          f"Workers: {n_workers}  Genes per subgroup: {[len(i) for i in gene_idx]}")
+
+    def score(best_fit):
+        """Score every subpopulation against the context; move the context to the best."""
+        nonlocal context
+        full = [_assemble(context, idx, pop) for idx, pop in zip(gene_idx, subpops)]
+        fits = np.asarray(score_population(np.vstack(full).tolist(), best_fit))
+        fits = fits.reshape(n_groups, POP_SIZE)
+        k, j = np.unravel_index(int(np.argmax(fits)), fits.shape)
+        if best_fit is None or fits[k, j] > best_fit:
+            context  = full[k][j]
+            best_fit = float(fits[k, j])
+        return fits, full, best_fit
+
+    prepare_simulations()
+    start_pool(n_workers)
+    try:
+        # Score the initial subpopulations; a resume restored their
+        # fitness (and the chromosomes it belongs to) from the checkpoint,
+        # except at generation 0, where the journal replays what finished
+        if checkpoint is None or checkpoint.get("fitness") is None:
+            fits, full, best_fit = score(None)
+
+        for generation in range(completed + 1, GENERATIONS + 1):
+            for k in range(n_groups):
+                elites     = np.argsort(-fits[k])[:KEEP_ELITISM]
+                offspring  = [make_offspring(subpops[k], fits[k], rng)
+                              for _ in range(POP_SIZE - KEEP_ELITISM)]
+                subpops[k] = np.vstack([subpops[k][elites]] + offspring)
+            fits, full, best_fit = score(best_fit)
+
+            print(" >> [Coevolution] best per subgroup: "
+                  + "  ".join(f"{f.max():.2f}" for f in fits))
+            genes = [int(g) for g in context]
+            log_generation(generation, genes, best_fit, results[tuple(genes)][1])
+            save_checkpoint(
+                generation   = generation,
+                population   = np.vstack(full).tolist(),
+                best_fitness = best_fit,
+                fitness      = fits.ravel(),
+                extra        = {"optimizer": MODE, "grouping": COEVO_GROUPING,
+                                "context": genes},
+                rngs         = {"ops": rng},
+            )
+    finally:
+        close_pool()
+
+    finish_run([int(g) for g in context], best_fit)
@@ -5,6 +5,7 @@
 # ============================================================
 
 import os
+import tempfile
 from pathlib import Path
 ROOT = Path(__file__).resolve().parent.parent
 
@@ -27,22 +28,174 @@ ROWS = 5
 
 # Simulation parameters 
 # MAX_STEPS: simulation steps per evaluation.
-# Each step advances the simulation clock by 0.05 simulated seconds.
+# Each step advances the simulation clock by STEP_LENGTH simulated seconds.
 # 8000 steps = 400 seconds of simulated traffic time.
-MAX_STEPS = 8000
+MAX_STEPS   = 8000
+STEP_LENGTH = 0.05
+
+# Fidelity levels
+# Named simulation settings, cheapest last. "full" is the reference
+# (MAX_STEPS x STEP_LENGTH, microscopic) used for all reported results.
+#   step_length: simulated seconds per step
+#   horizon:     simulated seconds per evaluation
+#   meso:        SUMO mesoscopic model (--mesosim) instead of microscopic
+FIDELITY_LEVELS = {
+    "full":   {"step_length": STEP_LENGTH, "horizon": MAX_STEPS * STEP_LENGTH, "meso": False},
+    "coarse": {"step_length": 0.5,         "horizon": MAX_STEPS * STEP_LENGTH, "meso": False},
+    "short":  {"step_length": 0.5,         "horizon": MAX_STEPS * STEP_LENGTH / 2, "meso": False},
+    "meso":   {"step_length": 1.0,         "horizon": MAX_STEPS * STEP_LENGTH, "meso": True},
+}
+
+# Multi-fidelity screening (persistent worker pool only)
+# SCREEN_FIDELITY: level every offspring batch is first evaluated at;
+# only the top SCREEN_KEEP fraction is re-run at "full". "" disables.
+# Pick the level from `py src/benchmarks.py fidelity` (cost + rank correlation).
+# Override at runtime:  $env:SCREEN_FIDELITY = "coarse"
+SCREEN_FIDELITY = os.environ.get("SCREEN_FIDELITY", "")
+SCREEN_KEEP     = 0.5
+
+# Simulation backend used by evaluate():
+#   "auto"    — in-process libsumo when importable, otherwise socket TraCI
+#   "libsumo" — in-process libsumo only (error if unavailable)
+#   "traci"   — TCP socket TraCI (original behaviour)
+# sumo-gui always runs over TraCI — libsumo cannot drive the GUI.
+# Override at runtime:  $env:SUMO_BACKEND = "traci"
+SUMO_BACKEND = os.environ.get("SUMO_BACKEND", "auto")
+
+# GA evaluator used by evaluate_worker:
+#   "traci" — eval_timings.evaluate(): plan applied over TraCI/libsumo
+#   "batch" — batch_eval.evaluate_batch(): plan written as a tlLogic
+#             additional file, plain `sumo` run, summary output parsed.
+#             No per-step traffic at all; ignores WARMUP_STEPS.
+# Override at runtime:  $env:EVALUATOR = "batch"
+EVALUATOR = os.environ.get("EVALUATOR", "traci")
+
+# Persistent workers
+# run_ga() always evaluates on a long-lived worker pool (worker_pool.py).
+# True: each worker keeps one SUMO open and reloads it between candidates.
+# False: each candidate launches (and closes) a fresh SUMO process.
+# Override at runtime:  $env:PERSISTENT_WORKERS = "0"
+PERSISTENT_WORKERS = os.environ.get("PERSISTENT_WORKERS", "1") == "1"
+
+# Metric collection mode used by evaluate():
+#   "vehicle"      — getIDList() + getSpeed() per vehicle per step (original)
+#   "subscription" — TraCI variable subscriptions; one batched fetch per step
+#   "lane"         — aggregate halting/speed/count of the signal approach
+#                    lanes; cost scales with lanes instead of vehicles
+# "vehicle" and "subscription" produce identical metrics. "lane" only
+# counts vehicles on the approaches to the traffic lights.
+# Override at runtime:  $env:METRICS_MODE = "vehicle"
+METRICS_MODE = os.environ.get("METRICS_MODE", "subscription")
+
+# Warm-start snapshots
+# WARMUP_STEPS > 0: the first WARMUP_STEPS of every evaluation (filling
+# the empty network under SUMO's default program) are simulated once per
+# (network, seed) and saved with SUMO state saving under SNAPSHOT_DIR.
+# Each evaluation then loads the snapshot, applies its timing plan and
+# simulates only steps WARMUP_STEPS+1 .. MAX_STEPS — metrics cover that
+# window. 0 disables warm starts (every evaluation starts empty).
+# Override at runtime:  $env:WARMUP_STEPS = "2000"
+WARMUP_STEPS = int(os.environ.get("WARMUP_STEPS", "0"))
+
+# Early abort of hopeless candidates (persistent worker pool only)
+# At each ABORT_CHECKPOINTS fraction of the simulated steps (counted
+# after WARMUP_STEPS with warm starts), a candidate is stopped once even
+# its optimistic final fitness — every vehicle still expected arrives
+# and nobody waits again — falls below the previous generation's
+# best fitness minus ABORT_MARGIN x |best|. Stopped runs are flagged
+# "truncated" and scored pessimistically (see eval_timings.fitness).
+# Override at runtime:  $env:EARLY_ABORT = "0"
+EARLY_ABORT       = os.environ.get("EARLY_ABORT", "1") == "1"
+ABORT_CHECKPOINTS = (0.25, 0.5, 0.75)
+ABORT_MARGIN      = 0.05
+
+# Gridlock detection
+# Over a sliding window of GRIDLOCK_WINDOW simulated seconds, a run is
+# declared gridlocked when nothing arrived while on average at least
+# GRIDLOCK_HALT_FRAC of the vehicles were halted, or when SUMO started
+# GRIDLOCK_TELEPORTS or more teleports (its own deadlock resolution).
+# Gridlocked runs stop at once with a penalty fitness (eval_timings.fitness).
+# Validation runs (baseline.py, the final GUI run) never stop early.
+# Override at runtime:  $env:GRIDLOCK_DETECT = "0"
+GRIDLOCK_DETECT    = os.environ.get("GRIDLOCK_DETECT", "1") == "1"
+GRIDLOCK_WINDOW    = 60.0
+GRIDLOCK_HALT_FRAC = 0.9
+GRIDLOCK_TELEPORTS = 5
+
+# Evaluation cache
+# Persistent SQLite store of results keyed by integer chromosome, seed,
+# simulation settings and network fingerprint (eval_cache.py). Checked
+# by evaluate_worker before launching SUMO; least recently used entries
+# beyond EVAL_CACHE_MAX are evicted.
+# Override at runtime:  $env:EVAL_CACHE = "0"
+EVAL_CACHE     = os.environ.get("EVAL_CACHE", "1") == "1"
+EVAL_CACHE_MAX = 100_000
+
+# Per-step traces returned with each result. Every TRACE_EVERY steps a
+# run records (step, vehicles, waiting, arrived_total, total_wait); the
+# generation best's trace is appended to ga_trace.csv. 0 = off.
+# Override at runtime:  $env:TRACE_EVERY = "100"
+TRACE_EVERY = int(os.environ.get("TRACE_EVERY", "0"))
+
+# Results always travel back to the main process over the pool's pipes.
+# DEBUG_CACHE additionally writes each one to worker_cache/{sol_idx}.json
+# for inspection while debugging — nothing reads those files.
+# Override at runtime:  $env:DEBUG_CACHE = "1"
+DEBUG_CACHE = os.environ.get("DEBUG_CACHE", "0") == "1"
 
 # Yellow phase duration in seconds is fixed. The yellow phase will always be 3 seconds
 YELLOW = 3
 
-# TraCI port base. Each parallel worker gets BASE_PORT + sol_idx
-# to avoid socket collisions between concurrent SUMO instances.
-BASE_PORT = 8813
+# TraCI ports. Workers lease free ports from [BASE_PORT, BASE_PORT +
+# PORT_SPAN) through lock files in PORT_LOCK_DIR (ports.py), so
+# concurrent GA runs, baselines and benchmarks on one host never share
+# a socket. The lock directory is host-wide on purpose: every checkout
+# of the project leases from the same pool.
+# A SUMO that fails to bind its port is restarted on a newly leased
+# port, up to START_RETRIES times.
+# Unused by the libsumo backend (no socket).
+BASE_PORT     = 8813
+PORT_SPAN     = int(os.environ.get("PORT_SPAN", "1000"))
+PORT_LOCK_DIR = Path(os.environ.get("PORT_LOCK_DIR", Path(tempfile.gettempdir()) / "uto_ports"))
+START_RETRIES = 3
+
+# Distributed evaluation (broker.py)
+# BROKER=1: the optimizer process listens on BROKER_HOST:BROKER_PORT and
+# sends every evaluation to agents instead of the local worker pool.
+# BROKER_HOST defaults to loopback; listening on other interfaces (e.g.
+# "0.0.0.0" for agents on other hosts) is refused without a BROKER_TOKEN.
+# Start one agent per worker host with
+#   py src/broker.py agent --host <broker host> --slots <cores>
+# BROKER_LOCAL_AGENTS > 0 also launches that many single-slot agents on
+# this machine (localhost testing). Agents must present BROKER_TOKEN.
+# Agents heartbeat every BROKER_HEARTBEAT seconds; one silent for three
+# intervals is dropped and its tasks re-dispatched, up to
+# BROKER_MAX_ATTEMPTS dispatches per task.
+# BROKER_PORT sits below BASE_PORT so it never collides with a TraCI lease.
+# Override at runtime:  $env:BROKER = "1"
+BROKER              = os.environ.get("BROKER", "0") == "1"
+BROKER_HOST         = os.environ.get("BROKER_HOST", "127.0.0.1")
+BROKER_PORT         = int(os.environ.get("BROKER_PORT", "8800"))
+BROKER_TOKEN        = os.environ.get("BROKER_TOKEN", "")
+BROKER_LOCAL_AGENTS = int(os.environ.get("BROKER_LOCAL_AGENTS", "0"))
+BROKER_HEARTBEAT    = 5.0
+BROKER_MAX_ATTEMPTS = 3
 
 # GA parameters 
 # Gene range: minimum and maximum green phase duration in seconds.
 GREEN_MIN = 10
 GREEN_MAX = 80
 
+# Chromosome encoding searched by every optimizer (chromosome.py).
+# Workers decode it to two greens per intersection before simulating.
+#   "independent" — 2 genes per intersection (original, 40 on grid20)
+#   "cycle_split" — one shared cycle + one split per intersection (21)
+#   "rows"        — (gA, gB) tied per row corridor (10)
+#   "corridor"    — north-south green per column, east-west per row (9)
+# Compare them with `py src/benchmarks.py convergence`.
+# Override at runtime:  $env:ENCODING = "corridor"
+ENCODING = os.environ.get("ENCODING", "independent")
+
 # Population size. Should match the number of parallel workers
 # so every member evaluates simultaneously in one generation.
 POP_SIZE = 12
@@ -50,6 +203,96 @@ POP_SIZE = 12
 # Number of generations to run.
 GENERATIONS = 20
 
+# Surrogate pre-screening (surrogate.py, generational GA only).
+# A Gaussian process trained on every simulated result predicts
+# fitness from the genes in microseconds. Each generation:
+#   - every offspring slot is filled from SURROGATE_POOL candidates:
+#     the best-predicted ones, plus SURROGATE_EXPLORE of the slots for
+#     the most uncertain ones, so the model keeps learning
+#   - adaptive mutation's quality check of un-mutated offspring is
+#     answered by the model instead of a simulation
+# Active once SURROGATE_MIN_TRAIN results exist; trained on the
+# SURROGATE_MAX_TRAIN most recent.
+# Override at runtime:  $env:SURROGATE = "1"
+SURROGATE           = os.environ.get("SURROGATE", "0") == "1"
+SURROGATE_POOL      = 20
+SURROGATE_EXPLORE   = 0.25
+SURROGATE_MIN_TRAIN = 2 * POP_SIZE
+SURROGATE_MAX_TRAIN = 500
+
+# Optimizer mode (pygad_optimizer.py dispatches on it):
+#   "ga"           — generational PyGAD GA (original)
+#   "steady_state" — asynchronous steady-state evolution: a new offspring
+#                    whenever a worker is free, no generation barrier
+#   "islands"      — N_ISLANDS populations of POP_SIZE evolved together on
+#                    one pool (N_ISLANDS * POP_SIZE parallel simulations);
+#                    every MIGRATION_EVERY generations each island sends
+#                    its MIGRANTS best to the next one (ring)
+#   "coevolution"  — cooperative coevolution: one subpopulation per grid
+#                    row or column (COEVO_GROUPING), scored together
+#                    with the best genes of the other subgroups
+#   "cmaes", "de"  — CMA-ES / differential evolution (engines.py), one
+#                    batch of POP_SIZE per generation on the same pool
+# Override at runtime:  $env:OPTIMIZER = "steady_state"
+OPTIMIZER = os.environ.get("OPTIMIZER", "ga")
+
+# Island model (OPTIMIZER=islands)
+# Override at runtime:  $env:N_ISLANDS = "8"
+N_ISLANDS       = int(os.environ.get("N_ISLANDS", "4"))
+MIGRATION_EVERY = 5
+MIGRANTS        = 2
+
+# Cooperative coevolution (OPTIMIZER=coevolution), for networks too large
+# for one population: TL_IDS is split into the rows or columns of the
+# grid and each subgroup's genes evolve in a subpopulation of POP_SIZE.
+# A candidate is scored inside the best full chromosome so far; every
+# subgroup's candidates go to the pool as one batch per generation.
+# Override at runtime:  $env:COEVO_GROUPING = "cols"
+COEVO_GROUPING = os.environ.get("COEVO_GROUPING", "rows")
+
+# Average wait (seconds per arrived vehicle) to report reaching: the
+# first generation whose best gets there prints the simulations used so
+# far, to compare optimizer modes on cost. 0 = off.
+# Override at runtime:  $env:TARGET_AVG_WAIT = "20"
+TARGET_AVG_WAIT = float(os.environ.get("TARGET_AVG_WAIT", "0"))
+
+# Evaluation journal (journal.py): every completed evaluation is
+# appended to checkpoints/journal.jsonl as it arrives, so a crash
+# mid-generation loses no finished simulation; a restart replays it and
+# dispatches only the missing candidates. Truncated at each checkpoint.
+# Override at runtime:  $env:JOURNAL = "0"
+JOURNAL = os.environ.get("JOURNAL", "1") == "1"
+
+# Checkpoint interval in evaluations for the non-generational modes
+# (the generational GA checkpoints after every generation).
+CHECKPOINT_EVERY = int(os.environ.get("CHECKPOINT_EVERY", str(POP_SIZE)))
+
+# Common random numbers: every candidate is scored on the same N_SEEDS
+# traffic realizations (seeds SEED_BASE .. SEED_BASE + N_SEEDS - 1) and
+# its fitness is the mean, so candidates are compared on identical
+# traffic instead of on noise. Each (candidate, seed) run is a separate
+# pool task. 1 = a single run with the sumocfg's own seed (original).
+# SEED_BASE keeps the GA's seeds apart from baseline.py's (42 + run).
+# Override at runtime:  $env:N_SEEDS = "4"
+N_SEEDS   = int(os.environ.get("N_SEEDS", "1"))
+SEED_BASE = 1000
+SEEDS     = [SEED_BASE + k for k in range(N_SEEDS)] if N_SEEDS > 1 else [None]
+
+# Racing (adaptive replication), replaces the fixed N_SEEDS when on.
+# Every candidate starts on RACE_MIN_SEEDS common seeds; one more seed
+# is then added, round by round, only to candidates whose confidence
+# interval (mean +- RACE_Z standard errors) still contains the
+# selection cutoff — the fitness needed to rank among the keep_elitism
+# best. Stops when no candidate is uncertain, at RACE_MAX_SEEDS per
+# candidate, or once a generation has used RACE_BUDGET simulations.
+# Override at runtime:  $env:RACING = "1"
+RACING         = os.environ.get("RACING", "0") == "1"
+RACE_MIN_SEEDS = 2
+RACE_MAX_SEEDS = 10
+RACE_Z         = 1.96
+RACE_BUDGET    = int(os.environ.get("RACE_BUDGET", str(POP_SIZE * 4)))
+RACE_SEEDS     = [SEED_BASE + k for k in range(RACE_MAX_SEEDS)]
+
 # Fitness penalty weight for total wait time.
 # Smaller alpha for larger networks where total_wait is proportionally larger.
 # 3-intersection: 0.01 | 20-intersection: 0.001
@@ -63,8 +306,13 @@ N_RUNS = 20
 BASELINE_PHASE = 42
 
 # File paths 
-CACHE_DIR       = ROOT / "worker_cache"
+CACHE_DIR       = ROOT / "worker_cache"   # DEBUG_CACHE sink only
 CHECKPOINT_DIR  = ROOT / "checkpoints"
 GA_HISTORY_CSV  = ROOT / "ga_history.csv"
+GA_TRACE_CSV    = ROOT / "ga_trace.csv"
 COMPARISON_CSV  = ROOT / "comparison_results.csv"
-CHECKPOINT_FILE = CHECKPOINT_DIR / "checkpoint.json"
\ No newline at end of file
+BENCHMARK_CSV   = ROOT / "benchmarks.csv"
+EVAL_CACHE_DB   = ROOT / "eval_cache.sqlite"
+CHECKPOINT_FILE = CHECKPOINT_DIR / "checkpoint.json"
+JOURNAL_FILE    = CHECKPOINT_DIR / "journal.jsonl"
+SNAPSHOT_DIR    = ROOT / "snapshots"   # per-network cache: warm-up states, TLS templates
\ No newline at end of file
@@ -0,0 +1,240 @@
+"""
+engines.py
+Pluggable optimizer engines over the batch evaluation API
+(OPTIMIZER=cmaes or OPTIMIZER=de).
+
+run_ga() is built around pygad.GA and its callbacks. The engines here
+only need a batch of chromosomes scored, so they all share one loop
+(run_engine) on top of score_population() -> worker_pool:
+  - an engine is three functions in ENGINES:
+      init(n_genes, rng)          -> state (a JSON-serializable dict)
+      ask(state, rng)             -> (POP_SIZE, n_genes) integer genes
+      tell(state, genes, fitness) -> update state with the scores
+  - every generation asks one batch, scores it on the pool, tells the
+    scores back, logs the best so far to ga_history.csv (same schema,
+    so the dashboard works unchanged) and checkpoints the state
+
+Engines:
+  - "cmaes" — CMA-ES (Hansen's (mu/mu_w, lambda) with rank-one and
+    rank-mu updates, lambda = POP_SIZE) on genes scaled to [0, 1],
+    samples clipped to the box and rounded to whole seconds
+  - "de"    — differential evolution, DE/rand/1/bin: each member is
+    challenged by one trial vector and replaced if the trial is at
+    least as good
+
+Both are NumPy-only. Compare them on simulations used: ga_history.csv
+logs simulations per generation, and TARGET_AVG_WAIT reports when a
+run first reaches that average wait.
+"""
+
+import math
+import multiprocessing
+
+import numpy as np
+
+from config import GREEN_MIN, GREEN_MAX, POP_SIZE, GENERATIONS, SEEDS
+from worker_pool import start_pool, close_pool
+from ga_ops import random_population
+from pygad_optimizer import (
+    N_GENES, results, score_population, log_generation, reset_logs,
+    prepare_simulations, save_checkpoint, load_checkpoint, restore_rngs, finish_run,
+)
+
+CMA_SIGMA0 = 0.3   # initial step size, in units of the gene range
+DE_F       = 0.5   # differential weight
+DE_CR      = 0.9   # crossover rate
+
+
+def _to_genes(x: np.ndarray) -> np.ndarray:
+    """[0, 1] coordinates to integer genes in [GREEN_MIN, GREEN_MAX]."""
+    return np.rint(GREEN_MIN + np.clip(x, 0.0, 1.0) * (GREEN_MAX - GREEN_MIN)).astype(int)
+
+
+# ============================================================
+# CMA-ES
+# ============================================================
+
+def _cma_params(n: int) -> dict:
+    """Default strategy parameters for dimension n and lambda = POP_SIZE."""
+    mu      = POP_SIZE // 2
+    weights = np.log(mu + 0.5) - np.log(np.arange(1, mu + 1))
+    weights = weights / weights.sum()
+    mueff   = 1.0 / (weights ** 2).sum()
+    c1      = 2.0 / ((n + 1.3) ** 2 + mueff)
+    cs      = (mueff + 2) / (n + mueff + 5)
+    return {
+        "mu":      mu,
+        "weights": weights,
+        "mueff":   mueff,
+        "cc":      (4 + mueff / n) / (n + 4 + 2 * mueff / n),
+        "cs":      cs,
+        "c1":      c1,
+        "cmu":     min(1 - c1, 2 * (mueff - 2 + 1 / mueff) / ((n + 2) ** 2 + mueff)),
+        "damps":   1 + 2 * max(0.0, math.sqrt((mueff - 1) / (n + 1)) - 1) + cs,
+        "chi_n":   math.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n * n)),
+    }
+
+
+def _cma_init(n_genes: int, rng: np.random.Generator) -> dict:
+    """Random mean, identity covariance."""
+    return {
+        "mean":  rng.uniform(0.0, 1.0, n_genes).tolist(),
+        "sigma": CMA_SIGMA0,
+        "C":     np.eye(n_genes).tolist(),
+        "pc":    [0.0] * n_genes,
+        "ps":    [0.0] * n_genes,
+        "g":     0,
+        "x":     None,   # last sampled points, in [0, 1]
+    }
+
+
+def _cma_ask(state: dict, rng: np.random.Generator) -> np.ndarray:
+    """Sample POP_SIZE points from N(mean, sigma^2 C), clipped to the box."""
+    mean   = np.asarray(state["mean"])
+    D2, B  = np.linalg.eigh(np.asarray(state["C"]))
+    z      = rng.standard_normal((POP_SIZE, len(mean)))
+    x      = np.clip(mean + state["sigma"] * (z * np.sqrt(np.maximum(D2, 1e-20))) @ B.T, 0.0, 1.0)
+    state["x"] = x.tolist()
+    return _to_genes(x)
+
+
+def _cma_tell(state: dict, genes: np.ndarray, fitness: np.ndarray):
+    """Move mean, evolution paths, covariance and step size toward the best mu."""
+    p      = _cma_params(len(state["mean"]))
+    x      = np.asarray(state["x"])
+    mean   = np.asarray(state["mean"])
+    sigma  = state["sigma"]
+    C      = np.asarray(state["C"])
+    pc, ps = np.asarray(state["pc"]), np.asarray(state["ps"])
+
+    # Fitness is maximized: the best mu are the highest
+    y   = (x[np.argsort(-fitness)[:p["mu"]]] - mean) / sigma
+    y_w = p["weights"] @ y
+
+    D2, B     = np.linalg.eigh(C)
+    inv_sqrtC = B @ np.diag(1 / np.sqrt(np.maximum(D2, 1e-20))) @ B.T
+    ps   = (1 - p["cs"]) * ps + math.sqrt(p["cs"] * (2 - p["cs"]) * p["mueff"]) * inv_sqrtC @ y_w
+    g    = state["g"] + 1
+    hsig = (np.linalg.norm(ps) / math.sqrt(1 - (1 - p["cs"]) ** (2 * g)) / p["chi_n"]
+            < 1.4 + 2 / (len(mean) + 1))
+    pc   = (1 - p["cc"]) * pc + hsig * math.sqrt(p["cc"] * (2 - p["cc"]) * p["mueff"]) * y_w
+    C    = ((1 - p["c1"] - p["cmu"]) * C
+            + p["c1"] * (np.outer(pc, pc) + (1 - hsig) * p["cc"] * (2 - p["cc"]) * C)
+            + p["cmu"] * (y.T * p["weights"]) @ y)
+    sigma *= math.exp(p["cs"] / p["damps"] * (np.linalg.norm(ps) / p["chi_n"] - 1))
+
+    state.update(
+        mean=np.clip(mean + sigma * y_w, 0.0, 1.0).tolist(), sigma=float(sigma),
+        C=C.tolist(), pc=pc.tolist(), ps=ps.tolist(), g=g,
+    )
+
+
+# ============================================================
+# DIFFERENTIAL EVOLUTION
+# ============================================================
+
+def _de_init(n_genes: int, rng: np.random.Generator) -> dict:
+    """Random population; scored by the first ask."""
+    return {"population": random_population(POP_SIZE, n_genes, rng).tolist(), "fitness": None}
+
+
+def _de_ask(state: dict, rng: np.random.Generator) -> np.ndarray:
+    """One DE/rand/1/bin trial vector per member (the population itself first)."""
+    pop = np.asarray(state["population"])
+    if state["fitness"] is None:
+        return pop
+    n, d   = pop.shape
+    trials = np.empty_like(pop)
+    for i in range(n):
+        a, b, c = rng.choice([j for j in range(n) if j != i], size=3, replace=False)
+        mutant  = pop[a] + DE_F * (pop[b] - pop[c])
+        cross   = rng.random(d) < DE_CR
+        cross[rng.integers(d)] = True
+        trials[i] = np.where(cross, mutant, pop[i])
+    return np.clip(np.rint(trials), GREEN_MIN, GREEN_MAX).astype(int)
+
+
+def _de_tell(state: dict, genes: np.ndarray, fitness: np.ndarray):
+    """Greedy one-to-one replacement."""
+    if state["fitness"] is None:
+        state["fitness"] = fitness.tolist()
+        return
+    pop, fit = np.asarray(state["population"]), np.asarray(state["fitness"])
+    better   = fitness >= fit
+    pop[better], fit[better] = genes[better], fitness[better]
+    state.update(population=pop.tolist(), fitness=fit.tolist())
+
+
+ENGINES = {
+    "cmaes": (_cma_init, _cma_ask, _cma_tell),
+    "de":    (_de_init,  _de_ask,  _de_tell),
+}
+
+
+# ============================================================
+# SHARED LOOP
+# ============================================================
+
+def run_engine(name: str):
+    """Run the named engine for GENERATIONS batches, with checkpoint/resume."""
+    init, ask, tell = ENGINES[name]
+    n_workers = min(POP_SIZE * len(SEEDS), multiprocessing.cpu_count())
+    rng       = np.random.default_rng()
+
+    checkpoint = load_checkpoint(name)
+    if checkpoint is not None:
+        completed  = checkpoint["generation"]
+        state      = checkpoint["state"]
+        best_genes = checkpoint["best_genes"]
+        # Generation 0 checkpoints have no best yet (and no abort bound)
+        best_fit   = checkpoint["best_fitness"] if best_genes is not None else None
+        restore_rngs(checkpoint, {"ops": rng})
+        if completed >= GENERATIONS:
+            print("[Checkpoint] Run already completed. Delete checkpoints/checkpoint.json to start fresh.")
+            return
+        print(f"[Config] Resuming from gen {completed} — "
+              f"{GENERATIONS - completed} generations remaining")
+    else:
+        completed  = 0
+        state      = init(N_GENES, rng)
+        best_genes = None
+        best_fit   = None
+        reset_logs()
+        # Checkpoint generation 0 before anything is simulated: a crash
+        # during the first batch asks it again and the journal replays
+        # the evaluations already finished
+        save_checkpoint(
+            generation   = 0,
+            population   = [],
+            best_fitness = float("-inf"),
+            extra        = {"optimizer": name, "best_genes": None, "state": state},
+            rngs         = {"ops": rng},
+        )
+    print(f"[Config] Engine: {name}  Workers: {n_workers}  Batch: {POP_SIZE}  "
+          f"Generations: {GENERATIONS}  Genes: {N_GENES}")
+
+    prepare_simulations()
+    start_pool(n_workers)
+    try:
+        for generation in range(completed + 1, GENERATIONS + 1):
+            genes   = ask(state, rng)
+            fitness = np.asarray(score_population(genes.tolist(), best_fit))
+            tell(state, genes, fitness)
+
+            j = int(np.argmax(fitness))
+            if best_fit is None or fitness[j] > best_fit:
+                best_genes, best_fit = [int(g) for g in genes[j]], float(fitness[j])
+            if name == "cmaes":
+                print(f" >> [CMA-ES] sigma={state['sigma']:.3f}")
+            log_generation(generation, best_genes, best_fit, results[tuple(best_genes)][1])
+            save_checkpoint(
+                generation   = generation,
+                population   = genes.tolist(),
+                best_fitness = best_fit,
+                extra        = {"optimizer": name, "best_genes": best_genes, "state": state},
+                rngs         = {"ops": rng},
+            )
+    finally:
+        close_pool()
+
+    finish_run(best_genes, best_fit)
@@ -0,0 +1,127 @@
+"""
+eval_cache.py
+Persistent memoization of simulation results (SQLite).
+
+A SUMO run is fully determined by the integer chromosome, the seed and
+the simulation settings, so repeated chromosomes — elites carried by
+keep_elitism, duplicate offspring, resumed populations, offspring that
+PyGAD's adaptive mutation already scored — never need a second run.
+
+The key covers:
+  - the integer genes and the seed
+  - MAX_STEPS, STEP_LENGTH, the fidelity level (name and its
+    FIDELITY_LEVELS parameters), warm-up, metrics mode, evaluator
+  - gridlock detection and its thresholds (window, halt fraction, teleports)
+  - the network fingerprint (sumocfg + net + route files)
+
+The store is shared by all worker processes (SQLite WAL mode) and
+bounded to EVAL_CACHE_MAX entries, evicting the least recently used.
+The size is checked on a process's first store and every EVICT_EVERY
+stores after it, so the bound may be overshot by a few batches.
+Runs stopped by early abort are never stored: they depend on the
+incumbent at the time, not only on the key.
+"""
+
+import json
+import time
+import hashlib
+import sqlite3
+
+from config import (
+    SUMOCFG, MAX_STEPS, STEP_LENGTH, FIDELITY_LEVELS, WARMUP_STEPS,
+    METRICS_MODE, EVALUATOR, EVAL_CACHE_DB, EVAL_CACHE_MAX, ENCODING,
+    GRIDLOCK_DETECT, GRIDLOCK_WINDOW, GRIDLOCK_HALT_FRAC, GRIDLOCK_TELEPORTS,
+)
+from net_info import input_fingerprint
+
+EVICT_EVERY = 1000   # stores between size checks, per process
+
+# One connection per process, opened on first use
+_conn   = None
+_stores = 0      # stores made by this process
+
+
+def _db() -> sqlite3.Connection:
+    """Open (and create if needed) the cache database for this process."""
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(EVAL_CACHE_DB, timeout=30, isolation_level=None)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS evals ("
+            "  key       TEXT PRIMARY KEY,"
+            "  metrics   TEXT NOT NULL,"
+            "  last_used REAL NOT NULL)"
+        )
+        _conn.execute("CREATE INDEX IF NOT EXISTS evals_lru ON evals (last_used)")
+    return _conn
+
+
+def _settings() -> list:
+    """Result-shaping settings and the network fingerprint, as strings."""
+    return [
+        str(MAX_STEPS), str(STEP_LENGTH), str(WARMUP_STEPS),
+        METRICS_MODE, EVALUATOR,
+        str(GRIDLOCK_DETECT), str(GRIDLOCK_WINDOW),
+        str(GRIDLOCK_HALT_FRAC), str(GRIDLOCK_TELEPORTS),
+        input_fingerprint(SUMOCFG),
+    ]
+
+
+def cache_key(genes: list, seed: int = None, fidelity: str = "full") -> str:
+    """Hash of everything that determines a simulation result."""
+    parts = [
+        ",".join(str(int(g)) for g in genes),
+        str(seed),
+        fidelity, json.dumps(FIDELITY_LEVELS.get(fidelity), sort_keys=True),
+        *_settings(),
+    ]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+
+def scenario_fingerprint() -> str:
+    """
+    Hash of what every evaluation of this run shares: the cache key's
+    settings and network, every fidelity level and the ENCODING used to
+    decode tasks that carry none. Two processes with the same value
+    return the same metrics for the same task (broker.py handshake).
+    """
+    parts = _settings() + [json.dumps(FIDELITY_LEVELS, sort_keys=True), ENCODING]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+
+def lookup(key: str) -> dict | None:
+    """Return the cached metrics for key (marking it recently used), or None."""
+    db  = _db()
+    row = db.execute("SELECT metrics FROM evals WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        return None
+    db.execute("UPDATE evals SET last_used = ? WHERE key = ?", (time.time(), key))
+    return json.loads(row[0])
+
+
+def store(key: str, metrics: dict):
+    """
+    Save metrics under key. Every EVICT_EVERY stores, evict the least
+    recently used entries beyond EVAL_CACHE_MAX. Early-aborted runs are
+    skipped.
+    """
+    global _stores
+    if metrics.get("truncated") and not metrics.get("gridlock"):
+        return
+    db = _db()
+    db.execute(
+        "INSERT OR REPLACE INTO evals (key, metrics, last_used) VALUES (?, ?, ?)",
+        (key, json.dumps(metrics), time.time()),
+    )
+    _stores += 1
+    if (_stores - 1) % EVICT_EVERY:
+        return
+    # Oldest first through the last_used index: only the evicted rows are read
+    (n,) = db.execute("SELECT COUNT(*) FROM evals").fetchone()
+    if n > EVAL_CACHE_MAX:
+        db.execute(
+            "DELETE FROM evals WHERE key IN ("
+            "  SELECT key FROM evals ORDER BY last_used LIMIT ?)",
+            (n - EVAL_CACHE_MAX,),
+        )
@@ -1,11 +1,12 @@
 """
 eval_timings.py
 Handles all SUMO simulation logic:
-  - Starting/stopping SUMO via TraCI
+  - Starting/stopping SUMO via libsumo (in-process) or TraCI (socket)
   - Setting green phase durations on all intersections
-  - Running simulations and collecting metrics
+  - Running simulations and collecting metrics (pluggable collectors)
+  - Warm-start snapshots shared by all candidates (ensure_snapshot)
   - Parallel worker entry point (evaluate_worker)
-  - File-based result cache for inter-process communication
+  - Optional per-step traces returned with the metrics
 
 This file has NO knowledge of the GA — it only runs simulations
 and returns metric dicts. All GA logic lives in pygad_optimizer.py.
@@ -14,14 +15,19 @@ and returns metric dicts. All GA logic lives in pygad_optimizer.py.
 import os
 import sys
 import json
+import hashlib
+import time
+from collections import deque
 from pathlib import Path
 
 # Import all constants from the central config
 from config import (
-    ROOT, SUMO_DIR, SUMOCFG,
-    COLS, ROWS,
-    MAX_STEPS, YELLOW, BASE_PORT,
-    POP_SIZE, CACHE_DIR,
+    ROOT, SUMO_DIR, SUMOCFG, SUMO_MAP,
+    STEP_LENGTH, FIDELITY_LEVELS, YELLOW, START_RETRIES,
+    CACHE_DIR, DEBUG_CACHE, METRICS_MODE, SUMO_BACKEND,
+    WARMUP_STEPS, SNAPSHOT_DIR, EVALUATOR, EVAL_CACHE, ENCODING,
+    ALPHA, ABORT_CHECKPOINTS,
+    GRIDLOCK_DETECT, GRIDLOCK_WINDOW, GRIDLOCK_HALT_FRAC, GRIDLOCK_TELEPORTS,
 )
 
 # Validate SUMO config exists before importing traci
@@ -32,37 +38,119 @@ if not SUMOCFG.exists():
         f"or set the SUMO_MAP environment variable correctly."
     )
 
+# Early-abort checkpoints are fractions of the simulated window (after
+# any warm-up); 0 or 1 would never leave anything to check or to save
+if not all(0 < frac < 1 for frac in ABORT_CHECKPOINTS):
+    raise ValueError(
+        f"ABORT_CHECKPOINTS must be fractions strictly between 0 and 1, "
+        f"got {ABORT_CHECKPOINTS}"
+    )
+
 # Add SUMO tools to Python path 
 if "SUMO_HOME" in os.environ:
     sys.path.append(str(Path(os.environ["SUMO_HOME"]) / "tools"))
 else:
     sys.exit("Please declare environment variable 'SUMO_HOME'")
 
+import numpy as np
 import traci
+import traci.constants as tc
+
+from net_info import net_file, incoming_lanes, input_fingerprint, tl_programs
+import eval_cache
+from ports import lease_port, release_port
+from chromosome import TL_IDS, N_INTERSECTIONS, decode, to_phases
+
+# Simulation backend
+# libsumo runs SUMO inside this process: same API as traci, but no TCP
+# socket, no per-call serialization and no ports to collide on.
+# One libsumo simulation per process — fine for the worker pool, where
+# each process evaluates one candidate at a time.
+libsumo = None
+if SUMO_BACKEND != "traci":
+    try:
+        import libsumo
+    except ImportError:
+        if SUMO_BACKEND == "libsumo":
+            raise ImportError(
+                "SUMO_BACKEND=libsumo but libsumo is not importable. "
+                "Install it (pip install libsumo) or use SUMO_BACKEND=auto."
+            )
+BACKEND = "libsumo" if libsumo is not None else "traci"
+
+# Open connections started by start_sumo(), keyed by label
+_connections = {}
+
+# Derived network constants: TL_IDS / N_INTERSECTIONS (chromosome layout)
+# live in chromosome.py and are re-exported from here.
 
-# Derived network constants 
-# TL_IDS: ordered list of all traffic light junction IDs.
-# Order defines the chromosome layout:
-#   gene[0]=J_0_0 phase A, gene[1]=J_0_0 phase B,
-#   gene[2]=J_0_1 phase A, gene[3]=J_0_1 phase B, ... etc.
-TL_IDS          = [f"J_{col}_{row}" for col in range(COLS) for row in range(ROWS)]
-N_INTERSECTIONS = len(TL_IDS)
+STOP_SPEED = 0.1    # m/s — below this a vehicle is considered waiting
 
 
-# Port allocation 
-def port_for_index(idx: int) -> int:
+# Fidelity levels
+def fidelity_level(name: str = "full") -> dict:
     """
-    Returns a unique TraCI port for a given worker index.
+    Resolve a FIDELITY_LEVELS entry into simulation parameters.
 
-    Without unique ports, concurrent SUMO instances collide on
-    the same TCP socket and crash. BASE_PORT + sol_idx guarantees
-    uniqueness within a generation (sol_idx ranges 0 to POP_SIZE-1).
+    Returns:
+        dict: {
+            name:         level name
+            step_len:     simulated seconds per step (--step-length)
+            max_steps:    steps per evaluation (horizon / step_len)
+            warmup_steps: WARMUP_STEPS converted to this step length
+            meso:         run SUMO's mesoscopic model
+        }
     """
-    return BASE_PORT + (idx % POP_SIZE)
+    if name not in FIDELITY_LEVELS:
+        raise ValueError(
+            f"Unknown fidelity '{name}'. Options: {', '.join(FIDELITY_LEVELS)}"
+        )
+    level    = FIDELITY_LEVELS[name]
+    step_len = level["step_length"]
+    return {
+        "name":         name,
+        "step_len":     step_len,
+        "max_steps":    round(level["horizon"] / step_len),
+        "warmup_steps": round(WARMUP_STEPS * STEP_LENGTH / step_len),
+        "meso":         level["meso"],
+    }
+
+
+# Port allocation
+# Ports come from host-wide leases (ports.py) rather than a fixed
+# BASE_PORT + index, so concurrent jobs never share one. If SUMO still
+# cannot bind a leased port, it is restarted on another lease; the
+# connection keeps its original label. Those replacement leases are
+# kept here, by label, until the connection closes.
+_fallback_ports = {}
+
+
+def _start_traci(cmd: list, port: int, label: str):
+    """
+    traci.start() on port, moving to a newly leased port (up to
+    START_RETRIES times) when SUMO fails to bind it.
+    """
+    for attempt in range(START_RETRIES + 1):
+        try:
+            traci.start(cmd, port=port, label=label)
+            return
+        except traci.exceptions.FatalTraCIError:
+            if attempt == START_RETRIES:
+                raise
+            release_port(_fallback_ports.pop(label, None))
+            new_port = _fallback_ports[label] = lease_port()
+            print(f"[SUMO] could not start on port {port}, retrying on {new_port}")
+            port = new_port
 
 
 # SUMO startup
-def start_sumo(gui: bool = False, seed: int = None, port: int = None):
+def start_sumo(
+    gui:        bool = False,
+    seed:       int  = None,
+    port:       int  = None,
+    extra_args: list = None,
+    fidelity:   str  = "full",
+):
     """
     Launch a SUMO instance and connect via TraCI.
 
@@ -72,31 +160,204 @@ def start_sumo(gui: bool = False, seed: int = None, port: int = None):
         seed: Random seed for vehicle spawning. Different seeds
               produce different traffic patterns, essential for
               statistical validation across multiple runs.
-        port: Unique TraCI port for this worker. If None, uses
-              the default port (single-process mode only).
+        port: TraCI port leased by this worker (ports.py); also the
+              connection label. If None, TraCI picks a free port
+              (single-process mode only). Ignored by libsumo.
+        extra_args: Additional SUMO command-line options.
+        fidelity: Fidelity level (key of FIDELITY_LEVELS).
     """
     binary = "sumo-gui" if gui else "sumo"
-    cmd = [
-        binary,
+    cmd    = [binary] + sumo_args(seed=seed, extra_args=extra_args, fidelity=fidelity)
+    label  = str(port) if port is not None else None
+
+    if libsumo is not None and not gui:
+        # In-process: the port is irrelevant, but the label is kept so
+        # callers address the connection the same way on both backends
+        libsumo.start(cmd)
+        _connections[label] = libsumo
+    elif port is not None:
+        # label=str(port) lets us retrieve this specific TraCI connection
+        # later with traci.getConnection(label) — required for parallel safety
+        # since multiple connections exist simultaneously
+        _start_traci(cmd, port, label)
+        _connections[label] = traci.getConnection(label)
+    else:
+        traci.start(cmd)
+        _connections[label] = traci
+
+
+def sumo_args(
+    seed:       int  = None,
+    extra_args: list = None,
+    fidelity:   str  = "full",
+) -> list:
+    """
+    SUMO command-line options (without the binary) shared by start_sumo()
+    and load() — a reloaded simulation must use exactly the same options.
+    """
+    level = fidelity_level(fidelity)
+    args  = [
         "-c", str(SUMOCFG),
-        "--step-length",        "0.05",   # 50ms per step
+        "--step-length",        str(level["step_len"]),   # 50ms per step at full fidelity
         "--delay",              "0",       # no artificial slowdown
         "--lateral-resolution", "0.1",     # lane-change precision
         "--start",                         # begin simulation immediately
     ]
+    if level["meso"]:
+        args.append("--mesosim")
     if seed is not None:
-        cmd += ["--seed", str(seed)]
+        args += ["--seed", str(seed)]
+    if extra_args:
+        args += list(extra_args)
+    return args
 
-    if port is not None:
-        # label=str(port) lets us retrieve this specific TraCI connection
-        # later with traci.getConnection(label) — required for parallel safety
-        # since multiple connections exist simultaneously
-        traci.start(cmd, port=port, label=str(port))
+
+def get_connection(label: str = None):
+    """
+    Return the connection object for a label passed to start_sumo().
+
+    The object exposes the TraCI API (conn.vehicle, conn.simulationStep,
+    ...) whichever backend is active: the libsumo module, a traci
+    Connection, or the traci module for the default connection.
+    """
+    if label in _connections:
+        return _connections[label]
+    return traci.getConnection(label) if label else traci
+
+
+def close_sumo(label: str = None):
+    """Close the simulation started under this label."""
+    try:
+        get_connection(label).close()
+    finally:
+        _connections.pop(label, None)
+        _persistent.discard(label)
+        release_port(_fallback_ports.pop(label, None))
+
+
+# Persistent sessions
+# A long-lived worker keeps its SUMO simulation open between candidates
+# and resets it with load() instead of relaunching: no process startup,
+# no new socket handshake. The labels of such sessions are kept here.
+_persistent = set()
+
+
+def open_sumo(
+    seed:       int  = None,
+    port:       int  = None,
+    extra_args: list = None,
+    persistent: bool = False,
+    fidelity:   str  = "full",
+):
+    """
+    Start a headless simulation, or reset the persistent one already
+    open under this label, and return its connection.
+
+    Args:
+        seed, port, extra_args, fidelity: as for start_sumo()
+        persistent: keep the simulation open after release_sumo() and
+                    reuse it via load() on the next call
+    """
+    label = str(port) if port is not None else None
+    if persistent and label in _persistent:
+        get_connection(label).load(
+            sumo_args(seed=seed, extra_args=extra_args, fidelity=fidelity)
+        )
     else:
-        traci.start(cmd)
+        start_sumo(seed=seed, port=port, extra_args=extra_args, fidelity=fidelity)
+        if persistent:
+            _persistent.add(label)
+    return get_connection(label)
+
+
+def release_sumo(label: str = None):
+    """Finish with a simulation: close it unless it is persistent."""
+    if label not in _persistent:
+        close_sumo(label)
+
+
+def shutdown_sumo():
+    """Close every open simulation, persistent ones included."""
+    for label in list(_connections):
+        try:
+            close_sumo(label)
+        except Exception:
+            # Already gone (SUMO crashed or socket closed) — nothing to do
+            pass
 
 
 # Phase setter 
+def phase_durations(gA, gB) -> tuple:
+    """
+    Durations of the 4 phases [green A, yellow, green B, yellow] for
+    one intersection. Shared by every way of applying a timing plan
+    (TraCI, tlLogic files) so they always agree.
+    """
+    # Enforce minimum green time — very short phases cause deadlocks
+    # where vehicles cannot clear the intersection in one cycle
+    return (max(5, int(gA)), YELLOW, max(5, int(gB)), YELLOW)
+
+
+# Program templates
+# The phase layout never changes between candidates — only durations do.
+# Templates are read and validated once per network and reused for every
+# candidate, so set_greens() needs no getAllProgramLogics() round-trip.
+# In-process cache keyed by network fingerprint; the on-disk JSON copy
+# lets worker processes skip parsing the net file.
+_templates = {}
+
+
+def program_templates() -> dict:
+    """
+    Validated 4-phase program template of every intersection in TL_IDS.
+
+    Read from the net file once per sumocfg (keyed by its content
+    fingerprint) and cached in memory and under SNAPSHOT_DIR. The disk
+    copy is written under a temporary name and renamed, so concurrent
+    workers can share it safely.
+
+    Returns:
+        dict: { tl_id: { "type": str, "programID": str, "offset": str,
+                         "states": [4 phase state strings] } }
+    """
+    key = input_fingerprint(SUMOCFG)
+    if key in _templates:
+        return _templates[key]
+
+    path = SNAPSHOT_DIR / f"{SUMO_MAP}_{key[:16]}.tls.json"
+    if path.exists():
+        templates = json.loads(path.read_text())
+    else:
+        programs  = tl_programs(str(net_file()))
+        templates = {}
+        for tl_id in TL_IDS:
+            prog     = programs.get(tl_id)
+            n_phases = len(prog["phases"]) if prog else 0
+            if n_phases != 4:
+                raise RuntimeError(
+                    f"Expected 4 phases for {tl_id}, got {n_phases}. "
+                    f"Verify network generation."
+                )
+            if prog["type"] != "static":
+                raise RuntimeError(
+                    f"Expected a static program for {tl_id}, got '{prog['type']}'. "
+                    f"Verify network generation."
+                )
+            templates[tl_id] = {
+                "type":      prog["type"],
+                "programID": prog["programID"],
+                "offset":    prog["offset"],
+                "states":    [state for _, state in prog["phases"]],
+            }
+        SNAPSHOT_DIR.mkdir(exist_ok=True)
+        tmp = path.with_name(f".{os.getpid()}.{path.name}")
+        tmp.write_text(json.dumps(templates))
+        os.replace(tmp, path)
+
+    _templates[key] = templates
+    return templates
+
+
 def set_greens(phases_dict: dict, label: str = None):
     """
     Apply a timing plan to all intersections via TraCI.
@@ -110,34 +371,42 @@ def set_greens(phases_dict: dict, label: str = None):
     Only the green durations are modified — yellow stays fixed
     at YELLOW seconds regardless of what the GA evolves.
 
+    Programs are built locally from the cached templates and applied
+    with setProgramLogic(). TraCI's Logic carries no offset, so the
+    template's offset is applied the way SUMO applies it when loading a
+    program: at simulation time t the cycle is at (t - offset) mod cycle
+    length. The program starts in that phase and setPhaseDuration() sets
+    what is left of it (at t = 0 with offset 0: phase 0, full duration).
+
     Args:
         phases_dict: { "J_0_0": (gA, gB), "J_0_1": (gA, gB), ... }
         label:       TraCI connection label. Pass str(port) when
                      running in parallel to access the correct connection.
     """
-    conn = traci.getConnection(label) if label else traci
+    conn      = get_connection(label)
+    templates = program_templates()
+    Logic     = conn.trafficlight.Logic   # traci and libsumo each
+    Phase     = conn.trafficlight.Phase   # provide their own classes
+    now       = conn.simulation.getTime()
 
     for tl_id, (gA, gB) in phases_dict.items():
-        # Enforce minimum green time — very short phases cause deadlocks
-        # where vehicles cannot clear the intersection in one cycle
-        gA = max(5, int(gA))
-        gB = max(5, int(gB))
-
-        prog   = conn.trafficlight.getAllProgramLogics(tl_id)[0]
-        phases = prog.phases
-
-        if len(phases) != 4:
-            raise RuntimeError(
-                f"Expected 4 phases for {tl_id}, got {len(phases)}. "
-                f"Verify network generation."
-            )
+        template  = templates[tl_id]
+        durations = phase_durations(gA, gB)
 
-        phases[0].duration = gA       # north-south green
-        phases[1].duration = YELLOW   # north-south yellow (fixed)
-        phases[2].duration = gB       # east-west green
-        phases[3].duration = YELLOW   # east-west yellow (fixed)
+        # Position in the cycle implied by the program offset
+        elapsed = (now - float(template["offset"])) % sum(durations)
+        index   = 0
+        while elapsed >= durations[index]:
+            elapsed -= durations[index]
+            index   += 1
 
-        conn.trafficlight.setProgramLogic(tl_id, prog)
+        # north-south green, yellow (fixed), east-west green, yellow (fixed)
+        phases = [Phase(duration, state) for duration, state in zip(durations, template["states"])]
+        conn.trafficlight.setProgramLogic(
+            tl_id,
+            Logic(template["programID"], tc.TRAFFICLIGHT_TYPE_STATIC, index, phases=phases),
+        )
+        conn.trafficlight.setPhaseDuration(tl_id, durations[index] - elapsed)
 
 
 # Fitness calculator 
@@ -150,96 +419,483 @@ def fitness(metrics: dict, alpha: float = 0.01) -> float:
     two objectives — lower alpha for larger networks where total_wait
     scales with the number of intersections and vehicles.
 
+    Runs stopped early (metrics["truncated"]: early abort or gridlock)
+    carry a pessimistic "wait_bound" — every vehicle still expected
+    waits for the rest of the horizon — which replaces total_wait here.
+    A truncated run never scores better than it could have by running
+    to the end; for a gridlock that bound is what would have happened.
+
     Args:
         metrics: dict returned by evaluate()
         alpha:   penalty weight. Import ALPHA from config rather than
                  passing a hardcoded value to ensure consistency.
     """
-    return metrics["arrived_total"] - alpha * metrics["total_wait"]
+    wait = metrics.get("wait_bound", metrics["total_wait"])
+    return metrics["arrived_total"] - alpha * wait
+
+
+def mean_metrics(runs: list, alpha: float = 0.01) -> dict:
+    """
+    Combine one chromosome's replications (one metrics dict per seed)
+    into a single metrics dict. Throughput, wait and speed are averaged,
+    so fitness() of the result is the mean per-seed fitness.
+
+    Args:
+        runs:  metric dicts of the same chromosome under different seeds
+        alpha: penalty weight used for the per-seed fitness values
+
+    Returns:
+        dict with evaluate()'s keys plus
+            seed_fitness: per-seed fitness values, in the order of runs
+            fitness_std:  their sample standard deviation (0 for one run)
+        wall_time sums the runs that were simulated (not cache hits);
+        cache_hit is True only if every run was one.
+    """
+    seed_fit = [fitness(m, alpha=alpha) for m in runs]
+    if len(runs) == 1:
+        return {**runs[0], "seed_fitness": seed_fit, "fitness_std": 0.0}
+
+    n      = len(runs)
+    merged = {
+        "genes":         runs[0]["genes"],
+        "steps_used":    max(m["steps_used"] for m in runs),
+        "arrived_total": sum(m["arrived_total"] for m in runs) / n,
+        "total_wait":    sum(m["total_wait"]    for m in runs) / n,
+        "avg_speed":     sum(m["avg_speed"]     for m in runs) / n,
+        "truncated":     any(m.get("truncated") for m in runs),
+        "gridlock":      any(m.get("gridlock")  for m in runs),
+        "steps_saved":   sum(m.get("steps_saved", 0) for m in runs),
+        "fidelity":      runs[0]["fidelity"],
+        "wall_time":     sum(m["wall_time"] for m in runs if not m.get("cache_hit")),
+        "cache_hit":     all(m.get("cache_hit") for m in runs),
+        "seed_fitness":  seed_fit,
+        "fitness_std":   float(np.std(seed_fit, ddof=1)),
+    }
+    if merged["truncated"]:
+        # Stopped runs contribute their bound, finished runs their wait
+        merged["wait_bound"] = sum(m.get("wait_bound", m["total_wait"]) for m in runs) / n
+    if "trace" in runs[0]:
+        merged["trace"] = runs[0]["trace"]
+    return merged
+
+
+# Warm-start snapshots
+def snapshot_path(seed: int = None, fidelity: str = "full") -> Path:
+    """
+    On-disk location of the warm-up snapshot for (network, seed).
+
+    The key covers the network contents (sumocfg + net + routes),
+    the seed, the warm-up length and the fidelity level, so a stale
+    snapshot can never be loaded after any of them change.
+    """
+    level = fidelity_level(fidelity)
+    key   = hashlib.sha256(
+        f"{input_fingerprint(SUMOCFG)}|{seed}|{level['warmup_steps']}|"
+        f"{level['step_len']}|{level['meso']}".encode()
+    ).hexdigest()[:16]
+    return SNAPSHOT_DIR / f"{SUMO_MAP}_{key}.xml.gz"
+
+
+def ensure_snapshot(
+    seed:       int  = None,
+    port:       int  = None,
+    persistent: bool = False,
+    fidelity:   str  = "full",
+) -> Path:
+    """
+    Return the warm-up snapshot for this seed, simulating it first if
+    it is not cached yet.
+
+    The warm-up runs SUMO's default program for WARMUP_STEPS steps and
+    saves the state including RNG state, so every candidate continues
+    from an identical network. The file is written under a temporary
+    name and renamed, so a concurrent worker never loads a partial file.
+    Call once from the parent before dispatching a population to avoid
+    several workers building the same snapshot at once.
+    """
+    level = fidelity_level(fidelity)
+    if not 0 < level["warmup_steps"] < level["max_steps"]:
+        raise ValueError(
+            f"WARMUP_STEPS must be between 1 and MAX_STEPS-1, got {WARMUP_STEPS}"
+        )
+
+    path = snapshot_path(seed, fidelity)
+    if path.exists():
+        return path
+
+    SNAPSHOT_DIR.mkdir(exist_ok=True)
+    conn = open_sumo(
+        seed=seed, port=port, extra_args=["--save-state.rng"],
+        persistent=persistent, fidelity=fidelity,
+    )
+    for _ in range(level["warmup_steps"]):
+        conn.simulationStep()
+
+    tmp = path.with_name(f".{os.getpid()}.{path.name}")
+    conn.simulation.saveState(str(tmp))
+    release_sumo(str(port) if port is not None else None)
+    os.replace(tmp, path)
+    return path
+
+
+# Metric collectors
+# Each mode is a (setup, sample) pair. setup(conn) runs once after SUMO
+# starts; sample(conn) runs after every simulationStep() and returns
+#   (vehicles, waiting, speed_sum, arrived, expected, teleports)
+# for that step, so evaluate() accumulates the same metrics in every mode.
+
+def _setup_vehicle(conn):
+    """Per-vehicle polling needs no setup."""
+
+
+def _sample_vehicle(conn) -> tuple:
+    """
+    Original collection: one getSpeed() round-trip per vehicle per step.
+    Cost grows with the number of vehicles in the network.
+    """
+    veh_ids   = conn.vehicle.getIDList()
+    waiting   = 0
+    speed_sum = 0.0
+    for vid in veh_ids:
+        spd = conn.vehicle.getSpeed(vid)
+        if spd < STOP_SPEED:
+            waiting += 1
+        speed_sum += spd
+
+    return (
+        len(veh_ids), waiting, speed_sum,
+        conn.simulation.getArrivedNumber(),
+        conn.simulation.getMinExpectedNumber(),
+        conn.simulation.getStartingTeleportNumber(),
+    )
+
+
+# Simulation-level variables delivered with every simulationStep() reply
+_SIM_VARS = (
+    tc.VAR_DEPARTED_VEHICLES_IDS,
+    tc.VAR_ARRIVED_VEHICLES_NUMBER,
+    tc.VAR_MIN_EXPECTED_VEHICLES,
+    tc.VAR_TELEPORT_STARTING_VEHICLES_NUMBER,
+)
+
+
+def _setup_subscription(conn):
+    """
+    Subscribe to simulation counters and to the speed of every vehicle
+    already in the network (non-empty after loading a saved state).
+    """
+    conn.simulation.subscribe(_SIM_VARS)
+    for vid in conn.vehicle.getIDList():
+        conn.vehicle.subscribe(vid, (tc.VAR_SPEED,))
+
+
+def _sample_subscription(conn) -> tuple:
+    """
+    Subscription-based collection.
+
+    SUMO pushes all subscribed values back in the simulationStep() reply,
+    so reading them is local. The only extra round-trips are one
+    subscribe() per newly departed vehicle — once per vehicle lifetime
+    instead of once per vehicle per step. Arrived vehicles drop out of
+    the subscription results automatically.
+    """
+    sim = conn.simulation.getSubscriptionResults()
+    for vid in sim[tc.VAR_DEPARTED_VEHICLES_IDS]:
+        # subscribe() replies with the current value, so new vehicles
+        # are counted on their departure step just like getIDList()
+        conn.vehicle.subscribe(vid, (tc.VAR_SPEED,))
+
+    speeds  = [v[tc.VAR_SPEED] for v in conn.vehicle.getAllSubscriptionResults().values()]
+    waiting = sum(1 for spd in speeds if spd < STOP_SPEED)
+
+    return (
+        len(speeds), waiting, sum(speeds),
+        sim[tc.VAR_ARRIVED_VEHICLES_NUMBER],
+        sim[tc.VAR_MIN_EXPECTED_VEHICLES],
+        sim[tc.VAR_TELEPORT_STARTING_VEHICLES_NUMBER],
+    )
+
+
+# Lane aggregates, in the column order of the per-step array
+_LANE_VARS = (
+    tc.LAST_STEP_VEHICLE_NUMBER,
+    tc.LAST_STEP_MEAN_SPEED,
+    tc.LAST_STEP_VEHICLE_HALTING_NUMBER,
+)
+
+
+def _setup_lanes(conn):
+    """
+    Subscribe to the aggregate state of every incoming lane at the
+    signalized intersections. The lane list is parsed from the net file
+    once per process (net_info.incoming_lanes is cached).
+    """
+    conn.simulation.subscribe(_SIM_VARS[1:])
+    for lane_id in incoming_lanes(tuple(TL_IDS), str(net_file())):
+        conn.lane.subscribe(lane_id, _LANE_VARS)
+
+
+def _sample_lanes(conn) -> tuple:
+    """
+    Lane-aggregate collection: cost scales with the number of lanes,
+    not the number of vehicles.
+
+    SUMO's halting threshold (0.1 m/s) equals STOP_SPEED, so halting
+    number counts exactly the vehicles the per-vehicle modes count as
+    waiting, and vehicle_number * mean_speed is each lane's speed sum.
+    Only vehicles on signal approaches are counted, so absolute values
+    are lower than the per-vehicle modes (vehicles on exit edges and
+    inside junctions are excluded) — compare runs within one mode.
+    """
+    sim  = conn.simulation.getSubscriptionResults()
+    lane = np.array(
+        [[r[var] for var in _LANE_VARS]
+         for r in conn.lane.getAllSubscriptionResults().values()],
+        dtype=float,
+    ).reshape(-1, len(_LANE_VARS))
+    counts, speeds, halting = lane.T
+
+    return (
+        int(counts.sum()), int(halting.sum()), float(counts @ speeds),
+        sim[tc.VAR_ARRIVED_VEHICLES_NUMBER],
+        sim[tc.VAR_MIN_EXPECTED_VEHICLES],
+        sim[tc.VAR_TELEPORT_STARTING_VEHICLES_NUMBER],
+    )
+
+
+COLLECTORS = {
+    "vehicle":      (_setup_vehicle,      _sample_vehicle),
+    "subscription": (_setup_subscription, _sample_subscription),
+    "lane":         (_setup_lanes,        _sample_lanes),
+}
 
 
 # Core simulation evaluator 
 def evaluate(
-    genes:   list,
-    gui:     bool = False,
-    verbose: bool = False,
-    seed:    int  = None,
-    port:    int  = None,
+    genes:       list,
+    gui:         bool  = False,
+    verbose:     bool  = False,
+    seed:        int   = None,
+    port:        int   = None,
+    mode:        str   = None,
+    persistent:  bool  = False,
+    fidelity:    str   = "full",
+    abort_below: float = None,
+    trace_every: int   = 0,
+    stop_early:  bool  = True,
 ) -> dict:
     """
     Run one complete SUMO simulation with the given timing plan.
 
+    With WARMUP_STEPS > 0 the run starts from the cached warm-up
+    snapshot for this seed and metrics cover the remaining steps only.
+
     Args:
-        genes:   Flat list of 2*N_INTERSECTIONS integers.
-                 Layout: [gA_J0_0, gB_J0_0, gA_J0_1, gB_J0_1, ..., gA_J3_4, gB_J3_4]
-                 Each consecutive pair (gA, gB) maps to one intersection
-                 in the same order as TL_IDS.
-        gui:     Open SUMO-GUI (single-process visualization only).
-        verbose: Print progress every 500 steps.
-        seed:    Random seed for vehicle spawning reproducibility.
-        port:    Unique TraCI port (required for parallel workers).
+        genes:      Flat list of 2*N_INTERSECTIONS integers.
+                    Layout: [gA_J0_0, gB_J0_0, gA_J0_1, gB_J0_1, ..., gA_J3_4, gB_J3_4]
+                    Each consecutive pair (gA, gB) maps to one intersection
+                    in the same order as TL_IDS.
+        gui:        Open SUMO-GUI (single-process visualization only).
+        verbose:    Print progress every 500 steps.
+        seed:       Random seed for vehicle spawning reproducibility.
+        port:       Unique TraCI port (required for parallel workers).
+        mode:       Metric collection mode (key of COLLECTORS).
+                    Defaults to METRICS_MODE from config.
+        persistent: Keep SUMO open afterwards and reload it on the next
+                    call with the same port (long-lived pool workers).
+                    Ignored with gui=True.
+        fidelity:   Fidelity level (key of FIDELITY_LEVELS). Anything
+                    other than "full" is for screening only.
+        abort_below: Incumbent-derived fitness bound. At each
+                    ABORT_CHECKPOINTS fraction, stop once the optimistic
+                    final fitness falls below it. None never aborts.
+        trace_every: Record a trace row every trace_every steps (0 = off).
+        stop_early: Allow the gridlock detector (GRIDLOCK_DETECT) to stop
+                    the run. Validation runs (baseline.py, the final GUI
+                    run) pass False: their raw total_wait must cover the
+                    whole horizon.
 
     Returns:
         dict: {
             genes:         input genes (list)
-            steps_used:    simulation steps actually run
+            steps_used:    last simulation step run (counts warm-up steps)
             arrived_total: vehicles that completed their route
             total_wait:    cumulative wait time across all vehicles (seconds)
             avg_speed:     mean vehicle speed across all steps (m/s)
+            truncated:     True if stopped early (see fitness())
+            gridlock:      True if stopped by the gridlock detector
+            gridlock_step: step the gridlock was detected (gridlock only)
+            steps_saved:   steps skipped by stopping early
+            wait_bound:    pessimistic total_wait (truncated runs only)
+            trace:         [step, vehicles, waiting, arrived_total, total_wait]
+                           rows (trace_every > 0 only)
+            fidelity:      fidelity level used
+            wall_time:     seconds spent on this evaluation
         }
     """
     assert len(genes) == N_INTERSECTIONS * 2, \
         f"Expected {N_INTERSECTIONS * 2} genes, got {len(genes)}"
 
-    label = str(port) if port is not None else None
-    start_sumo(gui=gui, seed=seed, port=port)
-    conn = traci.getConnection(label) if label else traci
-
-    # Build timing plan dict from flat gene array
-    phases_dict = {
-        tl_id: (genes[i * 2], genes[i * 2 + 1])
-        for i, tl_id in enumerate(TL_IDS)
+    mode = mode or METRICS_MODE
+    if mode not in COLLECTORS:
+        raise ValueError(
+            f"Unknown metrics mode '{mode}'. Options: {', '.join(COLLECTORS)}"
+        )
+    setup, sample = COLLECTORS[mode]
+    level = fidelity_level(fidelity)
+    t0    = time.perf_counter()
+
+    label    = str(port) if port is not None else None
+    snapshot = None
+    if WARMUP_STEPS > 0:
+        snapshot = ensure_snapshot(
+            seed, port, persistent=persistent and not gui, fidelity=fidelity,
+        )
+    if gui:
+        start_sumo(gui=True, seed=seed, port=port, fidelity=fidelity)
+        conn = get_connection(label)
+    else:
+        conn = open_sumo(seed=seed, port=port, persistent=persistent, fidelity=fidelity)
+
+    try:
+        # Warm start: continue from the shared warm-up state. Loaded before
+        # set_greens() so the candidate's plan replaces the default program.
+        if snapshot is not None:
+            conn.simulation.loadState(str(snapshot))
+
+        # Build timing plan dict from flat gene array
+        set_greens(to_phases(genes), label=label)
+        setup(conn)
+
+        metrics = _simulate(
+            conn, sample, level, verbose=verbose,
+            abort_below=abort_below, trace_every=trace_every, stop_early=stop_early,
+        )
+    except Exception:
+        # A failed run leaves SUMO in an unknown state — never reuse it
+        shutdown_sumo()
+        raise
+
+    release_sumo(label)
+    return {
+        "genes":     list(genes),
+        **metrics,
+        "fidelity":  fidelity,
+        "wall_time": time.perf_counter() - t0,
     }
-    set_greens(phases_dict, label=label)
 
-    # Simulation loop
+
+def _simulate(
+    conn,
+    sample,
+    level:       dict,
+    verbose:     bool  = False,
+    abort_below: float = None,
+    trace_every: int   = 0,
+    stop_early:  bool  = True,
+) -> dict:
+    """
+    Step the simulation to the level's max_steps (or until no vehicles
+    remain), accumulating metrics from the collector's per-step samples.
+
+    With abort_below set, the run is checked at ABORT_CHECKPOINTS,
+    fractions of the simulated window: with a warm start they count from
+    the end of the warm-up, which is loaded rather than stepped here.
+    Optimistic final fitness = arrived + expected - ALPHA * wait so far
+    (at most every expected vehicle still arrives; wait never decreases).
+    Below abort_below the candidate cannot beat the incumbent and stops.
+
+    With GRIDLOCK_DETECT and stop_early, a sliding window of GRIDLOCK_WINDOW seconds
+    tracks arrivals, halted vehicles and teleports; a deadlocked run
+    stops as soon as the window shows it (see config.py for the rule).
+
+    With trace_every set, every trace_every-th step appends a
+    [step, vehicles, waiting, arrived_total, total_wait] row to
+    metrics["trace"].
+    """
+    step_len    = level["step_len"]
+    max_steps   = level["max_steps"]
+    warmup      = level["warmup_steps"]
+    checkpoints = set()
+    if abort_below is not None:
+        checkpoints = {
+            warmup + round(frac * (max_steps - warmup)) for frac in ABORT_CHECKPOINTS
+        }
+    truncated = False
+    gridlock  = False
+
+    # Sliding window of per-step (arrived, waiting, vehicles, teleports)
+    window   = deque(maxlen=max(1, round(GRIDLOCK_WINDOW / step_len)))
+    win_sums = [0, 0, 0, 0]
     total_wait    = 0.0
     total_speed   = 0.0
     speed_samples = 0
     arrived_total = 0
-    STEP_LEN   = 0.05   # seconds per simulation step (must match --step-length)
-    STOP_SPEED = 0.1    # m/s — below this a vehicle is considered waiting
+    trace         = []
 
-    for step in range(1, MAX_STEPS + 1):
+    for step in range(warmup + 1, max_steps + 1):
         conn.simulationStep()
 
-        veh_ids = conn.vehicle.getIDList()
-        for vid in veh_ids:
-            spd = conn.vehicle.getSpeed(vid)
-            if spd < STOP_SPEED:
-                total_wait += STEP_LEN   # accumulate wait in seconds
-            total_speed   += spd
-            speed_samples += 1
-
-        arrived_total += conn.simulation.getArrivedNumber()
+        vehicles, waiting, speed_sum, arrived, expected, teleports = sample(conn)
+        total_wait    += waiting * step_len   # accumulate wait in seconds
+        total_speed   += speed_sum
+        speed_samples += vehicles
+        arrived_total += arrived
 
         if verbose and step % 500 == 0:
-            print(f"step {step}  vehicles {len(veh_ids)}  arrived {arrived_total}")
+            print(f"step {step}  vehicles {vehicles}  arrived {arrived_total}")
+        if trace_every and step % trace_every == 0:
+            trace.append([step, vehicles, waiting, arrived_total, round(total_wait, 2)])
 
         # Early exit: all vehicles have either arrived or are no longer expected
-        if conn.simulation.getMinExpectedNumber() <= 0:
+        if expected <= 0:
             break
 
-    conn.close()
+        # Gridlock: nothing moves any more — more steps only burn CPU
+        if GRIDLOCK_DETECT and stop_early:
+            if len(window) == window.maxlen:
+                for i, old in enumerate(window[0]):
+                    win_sums[i] -= old
+            window.append((arrived, waiting, vehicles, teleports))
+            for i, new in enumerate(window[-1]):
+                win_sums[i] += new
+            win_arrived, win_waiting, win_vehicles, win_teleports = win_sums
+            if len(window) == window.maxlen and (
+                win_teleports >= GRIDLOCK_TELEPORTS
+                or (win_arrived == 0 and win_vehicles > 0
+                    and win_waiting >= GRIDLOCK_HALT_FRAC * win_vehicles)
+            ):
+                truncated = gridlock = True
+                break
+
+        # Early abort: the candidate can no longer beat the incumbent
+        if step in checkpoints and \
+                arrived_total + expected - ALPHA * total_wait < abort_below:
+            truncated = True
+            break
 
     avg_speed = (total_speed / speed_samples) if speed_samples else 0.0
-    return {
-        "genes":         list(genes),
+    metrics   = {
         "steps_used":    step,
         "arrived_total": arrived_total,
         "total_wait":    total_wait,
         "avg_speed":     avg_speed,
+        "truncated":     truncated,
+        "gridlock":      gridlock,
+        "steps_saved":   max_steps - step if truncated else 0,
     }
+    if gridlock:
+        metrics["gridlock_step"] = step
+    if trace_every:
+        metrics["trace"] = trace
+    if truncated:
+        # Pessimistic: every expected vehicle waits for the rest of the horizon
+        metrics["wait_bound"] = total_wait + expected * (max_steps - step) * step_len
+        if verbose and gridlock:
+            print(f"step {step}  gridlock detected")
+        elif verbose:
+            print(f"step {step}  aborted: cannot beat incumbent ({abort_below:.2f})")
+    return metrics
 
 
 # Parallel worker entry point 
@@ -247,29 +903,81 @@ def evaluate_worker(args: tuple) -> dict:
     """
     Entry point for each parallel worker process in the GA population.
 
-    Called by PyGAD's parallel_processing pool. Each worker:
-      1. Derives a unique TraCI port from sol_idx (no socket collisions)
-      2. Runs a full SUMO simulation
-      3. Writes result to worker_cache/{sol_idx}.json
-         (Windows multiprocessing cannot share memory directly —
-          file-based cache is the reliable cross-process communication method)
-      4. Returns the result dict to the GA fitness function
+    Called by the long-lived worker_pool (or directly, e.g. for
+    benchmarks). Each worker:
+      1. Returns the stored result if this chromosome was already
+         simulated with the same settings (EVAL_CACHE, eval_cache.py)
+      2. Leases a free TraCI port for this run (ports.py), unless the
+         caller supplies its own in opts (pool workers lease one for
+         their whole lifetime)
+      3. Runs a full SUMO simulation (EVALUATOR: TraCI or batch)
+      4. Returns the result dict (cache_hit set); the pool sends it back
+         to the main process over its result pipe. With DEBUG_CACHE it
+         is also written to worker_cache/{sol_idx}.json for inspection
 
     Args:
-        args: tuple of (sol_idx, genes, _)
-              sol_idx: worker index 0 to POP_SIZE-1
+        args: tuple of (sol_idx, genes, opts)
+              sol_idx: index of the task in its batch (debug dump name)
               genes:   flat list of green phase durations
-              _:       unused — required by PyGAD parallel format
+              opts:    None, or dict of evaluation options:
+                         port:       TraCI port (default: leased for this run)
+                         persistent: reuse this process's SUMO (default False)
+                         fidelity:   FIDELITY_LEVELS key (default "full")
+                         abort_below: early-abort bound (TraCI evaluator only)
+                         trace:      trace interval in steps (default 0 = off)
+                         seed:       SUMO seed (default None = sumocfg's)
+                         encoding:   ENCODINGS key of genes (default ENCODING)
     """
-    sol_idx, genes, _ = args
-    port = port_for_index(sol_idx)
-
-    result = evaluate(genes, gui=False, verbose=False, seed=None, port=port)
-
-    # Write to file-based cache for main process to read
-    CACHE_DIR.mkdir(exist_ok=True)
-    cache_file = CACHE_DIR / f"{sol_idx}.json"
-    with open(cache_file, "w") as f:
-        json.dump(result, f)
+    sol_idx, genes, opts = args
+    opts     = opts or {}
+    # Simulations and the cache always see the full layout (chromosome.py)
+    genes    = decode(genes, opts.get("encoding", ENCODING))
+    port     = opts.get("port")
+    fidelity = opts.get("fidelity", "full")
+    trace    = opts.get("trace", 0)
+    seed     = opts.get("seed")
+
+    key    = None
+    result = None
+    if EVAL_CACHE:
+        key    = eval_cache.cache_key(genes, seed=seed, fidelity=fidelity)
+        result = eval_cache.lookup(key)
+        # A result stored without a trace cannot serve a traced request
+        if result is not None and trace and "trace" not in result:
+            result = None
+
+    if result is not None:
+        result["cache_hit"] = True
+    elif EVALUATOR == "batch":
+        # Imported here: batch_eval builds on this module
+        from batch_eval import evaluate_batch
+        result = evaluate_batch(
+            genes, gui=False, verbose=False, seed=seed, port=port,
+            fidelity=fidelity, trace_every=trace,
+        )
+    else:
+        leased = port is None and BACKEND == "traci"
+        if leased:
+            port = lease_port()
+        try:
+            result = evaluate(
+                genes, gui=False, verbose=False, seed=seed, port=port,
+                persistent=opts.get("persistent", False), fidelity=fidelity,
+                abort_below=opts.get("abort_below"), trace_every=trace,
+            )
+        finally:
+            if leased:
+                release_port(port)
+
+    if not result.get("cache_hit"):
+        result["cache_hit"] = False
+        if key is not None:
+            eval_cache.store(key, result)
+
+    # Debug sink only — the main process gets the returned dict
+    if DEBUG_CACHE:
+        CACHE_DIR.mkdir(exist_ok=True)
+        with open(CACHE_DIR / f"{sol_idx}.json", "w") as f:
+            json.dump(result, f)
 
     return result
\ No newline at end of file
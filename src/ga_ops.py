@@ -0,0 +1,72 @@
+"""
+ga_ops.py
+NumPy genetic operators for the optimizers that do not run through
+PyGAD (steady_state.py and later modes).
+
+They mirror the PyGAD configuration in pygad_optimizer.py so every
+mode searches the same way:
+  - integer genes in [GREEN_MIN, GREEN_MAX]
+  - tournament selection (K_TOURNAMENT), KEEP_ELITISM elites
+  - two-point crossover
+  - adaptive mutation: MUTATION_PERCENT[0] of the genes for offspring
+    of below-average parents, MUTATION_PERCENT[1] otherwise
+
+Every function takes an explicit np.random.Generator so a run is
+reproducible from its seed.
+"""
+
+import numpy as np
+
+from config import GREEN_MIN, GREEN_MAX
+
+K_TOURNAMENT     = 3
+KEEP_ELITISM     = 3
+MUTATION_PERCENT = (40, 10)   # (low-quality, high-quality), as PyGAD's adaptive
+
+
+def random_population(n: int, n_genes: int, rng: np.random.Generator) -> np.ndarray:
+    """n random chromosomes, shape (n, n_genes), genes in [GREEN_MIN, GREEN_MAX]."""
+    return rng.integers(GREEN_MIN, GREEN_MAX + 1, size=(n, n_genes))
+
+
+def tournament(fitness: np.ndarray, rng: np.random.Generator, k: int = K_TOURNAMENT) -> int:
+    """Index of the fittest of k members drawn at random (with replacement)."""
+    entrants = rng.integers(0, len(fitness), size=k)
+    return int(entrants[np.argmax(fitness[entrants])])
+
+
+def two_point_crossover(a: np.ndarray, b: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Child taking a's genes outside [i, j) and b's genes inside."""
+    i, j  = np.sort(rng.choice(len(a) + 1, size=2, replace=False))
+    child = a.copy()
+    child[i:j] = b[i:j]
+    return child
+
+
+def mutate(genes: np.ndarray, percent: float, rng: np.random.Generator) -> np.ndarray:
+    """Reset percent% of the genes (at least one) to random values in range."""
+    n_mut = max(1, round(len(genes) * percent / 100))
+    idx   = rng.choice(len(genes), size=n_mut, replace=False)
+    out   = genes.copy()
+    out[idx] = rng.integers(GREEN_MIN, GREEN_MAX + 1, size=n_mut)
+    return out
+
+
+def make_offspring(
+    population: np.ndarray,
+    fitness:    np.ndarray,
+    rng:        np.random.Generator,
+) -> np.ndarray:
+    """
+    One child: two tournament parents, two-point crossover, adaptive
+    mutation (heavier when the parents are below the population mean).
+
+    Args:
+        population: (n, n_genes) integer chromosomes
+        fitness:    (n,) fitness of each member
+    """
+    p1, p2  = tournament(fitness, rng), tournament(fitness, rng)
+    child   = two_point_crossover(population[p1], population[p2], rng)
+    low     = (fitness[p1] + fitness[p2]) / 2 < fitness.mean()
+    percent = MUTATION_PERCENT[0] if low else MUTATION_PERCENT[1]
+    return mutate(child, percent, rng)
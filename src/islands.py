@@ -0,0 +1,144 @@
+"""
+islands.py
+Island-model GA (OPTIMIZER=islands).
+
+One population of POP_SIZE caps a run at POP_SIZE parallel simulations
+and converges early on a 40-gene problem. Here N_ISLANDS populations
+evolve side by side:
+  - every generation each island keeps its KEEP_ELITISM elites and
+    breeds the rest with the ga_ops operators (same scheme as the GA)
+  - the offspring of all islands go to the worker pool as ONE batch,
+    so the pool is sized N_ISLANDS * POP_SIZE (up to the core count)
+    and a slow island never idles the workers of another
+  - every MIGRATION_EVERY generations each island sends copies of its
+    MIGRANTS best to the next island (ring), replacing its worst
+
+All islands feed one ga_history.csv (one row per generation, global
+best) and one checkpoint holding every island's population.
+"""
+
+import multiprocessing
+
+import numpy as np
+
+from config import POP_SIZE, GENERATIONS, SEEDS, N_ISLANDS, MIGRATION_EVERY, MIGRANTS
+from worker_pool import start_pool, close_pool
+from ga_ops import random_population, make_offspring, KEEP_ELITISM
+from pygad_optimizer import (
+    N_GENES, results, score_population, log_generation, reset_logs,
+    prepare_simulations, save_checkpoint, load_checkpoint, restore_rngs, finish_run,
+)
+
+MODE = "islands"
+
+
+def _evaluate_all(genes_list: list, bests: list) -> list:
+    """
+    Evaluate the chromosomes of every island as one pool batch.
+
+    The early-abort bound must hold for every island, so it comes from
+    the weakest island's incumbent.
+    """
+    return score_population(genes_list, min(bests) if bests else None)
+
+
+def _migrate(pops: list, fits: list):
+    """Ring migration: copies of each island's MIGRANTS best replace the next island's worst."""
+    movers = [
+        [(pops[i][j].copy(), fits[i][j]) for j in np.argsort(-fits[i])[:MIGRANTS]]
+        for i in range(N_ISLANDS)
+    ]
+    for i, group in enumerate(movers):
+        dest = (i + 1) % N_ISLANDS
+        for genes, f in group:
+            if any(np.array_equal(genes, g) for g in pops[dest]):
+                continue
+            worst = int(np.argmin(fits[dest]))
+            if f > fits[dest][worst]:
+                pops[dest][worst], fits[dest][worst] = genes, f
+
+
+def run_islands():
+    """Run the island-model GA, with checkpoint/resume."""
+    n_workers = min(N_ISLANDS * POP_SIZE * len(SEEDS), multiprocessing.cpu_count())
+    rng       = np.random.default_rng()
+
+    checkpoint = load_checkpoint(MODE)
+    if checkpoint is not None and checkpoint.get("islands") != N_ISLANDS:
+        print(f"[Checkpoint] Saved with {checkpoint.get('islands')} islands, "
+              f"running {N_ISLANDS}. Starting fresh.")
+        checkpoint = None
+    if checkpoint is not None:
+        completed = checkpoint["generation"]
+        flat      = np.asarray(checkpoint["population"], dtype=int)
+        restore_rngs(checkpoint, {"ops": rng})
+        if completed >= GENERATIONS:
+            print("[Checkpoint] Run already completed. Delete checkpoints/checkpoint.json to start fresh.")
+            return
+        print(f"[Config] Resuming from gen {completed} — "
+              f"{GENERATIONS - completed} generations remaining")
+    else:
+        completed = 0
+        flat      = random_population(N_ISLANDS * POP_SIZE, N_GENES, rng)
+        reset_logs()
+        # Checkpoint generation 0 before anything is simulated: a crash
+        # while scoring it resumes these populations and the journal
+        # replays the evaluations already finished
+        save_checkpoint(
+            generation   = 0,
+            population   = flat.tolist(),
+            best_fitness = float("-inf"),
+            extra        = {"optimizer": MODE, "islands": N_ISLANDS},
+            rngs         = {"ops": rng},
+        )
+    print(f"[Config] Islands: {N_ISLANDS} x {POP_SIZE}  Workers: {n_workers}  "
+          f"Migration: {MIGRANTS} every {MIGRATION_EVERY} gens  Genes: {N_GENES}")
+
+    prepare_simulations()
+    start_pool(n_workers)
+    try:
+        # Score the initial (or resumed) populations — restored from the
+        # checkpoint on resume (replayed from the journal at generation 0)
+        pops = [flat[i * POP_SIZE:(i + 1) * POP_SIZE] for i in range(N_ISLANDS)]
+        fits = np.asarray(_evaluate_all(flat.tolist(), [])).reshape(N_ISLANDS, POP_SIZE)
+        fits = list(fits)
+
+        for generation in range(completed + 1, GENERATIONS + 1):
+            offspring = []
+            for pop, fit in zip(pops, fits):
+                offspring += [
+                    make_offspring(pop, fit, rng) for _ in range(POP_SIZE - KEEP_ELITISM)
+                ]
+            child_fit = _evaluate_all(
+                [child.tolist() for child in offspring], [f.max() for f in fits]
+            )
+
+            n_child = POP_SIZE - KEEP_ELITISM
+            for i in range(N_ISLANDS):
+                elites  = np.argsort(-fits[i])[:KEEP_ELITISM]
+                pops[i] = np.vstack([pops[i][elites]] + offspring[i * n_child:(i + 1) * n_child])
+                fits[i] = np.concatenate([fits[i][elites], child_fit[i * n_child:(i + 1) * n_child]])
+
+            if generation % MIGRATION_EVERY == 0:
+                _migrate(pops, fits)
+
+            # Unified history: one row per generation, best of all islands
+            island_bests = [float(f.max()) for f in fits]
+            print(" >> [Islands] best per island: "
+                  + "  ".join(f"{b:.2f}" for b in island_bests))
+            i     = int(np.argmax(island_bests))
+            genes = [int(g) for g in pops[i][int(np.argmax(fits[i]))]]
+            log_generation(generation, genes, island_bests[i], results[tuple(genes)][1])
+            save_checkpoint(
+                generation   = generation,
+                population   = np.vstack(pops).tolist(),
+                best_fitness = island_bests[i],
+                extra        = {"optimizer": MODE, "islands": N_ISLANDS},
+                rngs         = {"ops": rng},
+            )
+    finally:
+        close_pool()
+
+    i = int(np.argmax([f.max() for f in fits]))
+    j = int(np.argmax(fits[i]))
+    finish_run([int(g) for g in pops[i][j]], float(fits[i][j]))
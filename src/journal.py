@@ -0,0 +1,122 @@
+"""
+journal.py
+Durable journal of completed evaluations (checkpoints/journal.jsonl).
+
+Checkpoints are written once per generation; a crash mid-generation
+would lose every simulation finished since. The journal closes that gap:
+  - every result that reaches the main process is appended at once as
+    one JSON line: genes, seed, fidelity, encoding, early-abort bound
+    and metrics
+  - on restart, replay() loads it and worker_pool answers any task
+    already in it without dispatching it. That covers the candidates a
+    resumed run requests again with the same options: the checkpointed
+    population, and the offspring of the modes whose exact-resume
+    checkpoint makes them breed the same offspring again (generational
+    ones: ga, islands, coevolution, cmaes, de). Every mode checkpoints
+    its initial population (generation 0) before scoring it, so a crash
+    before the first periodic checkpoint is covered too. steady_state
+    breeds after each result, so its offspring in flight at the crash
+    are not requested again and their entries go unused
+  - each checkpoint truncates it: the checkpoint now holds those results
+
+Only the optimizer process writes, from the pool's result thread, the
+broker's threads or the main thread; appends are serialized by a lock
+and each line goes out as a single O_APPEND write followed by fsync.
+A torn last line (crash mid-write) is skipped on replay.
+
+The journal is off until start() is called, so benchmarks and broker
+agents using worker_pool never touch it.
+"""
+
+import os
+import json
+import threading
+
+from config import JOURNAL, JOURNAL_FILE, ENCODING
+
+_lock    = threading.Lock()
+_entries = {}     # task key -> metrics, replayed from disk
+_active  = False
+
+
+def _key(genes: list, opts: dict) -> str:
+    """
+    Identity of an evaluation: genes, seed, fidelity, encoding and the
+    early-abort bound — a run cut short under one bound is no answer
+    for another bound, or for none.
+    """
+    opts = opts or {}
+    return json.dumps([
+        [int(g) for g in genes], opts.get("seed"),
+        opts.get("fidelity", "full"), opts.get("encoding", ENCODING),
+        opts.get("abort_below"),
+    ])
+
+
+def start():
+    """Enable journaling for this run and replay what an earlier run recorded."""
+    global _active
+    if not JOURNAL:
+        return
+    _active = True
+    replay()
+
+
+def replay() -> int:
+    """Load journal entries into memory; returns how many were read."""
+    _entries.clear()
+    if not JOURNAL_FILE.exists():
+        return 0
+    with open(JOURNAL_FILE, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue   # torn write from a crash
+            _entries[entry["key"]] = entry["metrics"]
+    if _entries:
+        print(f"[Journal] {len(_entries)} completed evaluations replayed from {JOURNAL_FILE.name}")
+    return len(_entries)
+
+
+def lookup(genes: list, opts: dict) -> dict | None:
+    """
+    Journaled metrics of this evaluation, or None if it must run.
+
+    Tagged journal_hit, not cache_hit: the run was simulated (before the
+    crash) and counts as a simulation, as it would have without one;
+    cache_hit_rate stays the evaluation cache's own statistic.
+    """
+    if not _active:
+        return None
+    m = _entries.get(_key(genes, opts))
+    # Same rule as the evaluation cache: no trace cannot serve a traced request
+    if m is None or ((opts or {}).get("trace") and "trace" not in m):
+        return None
+    return dict(m, journal_hit=True)
+
+
+def append(genes: list, opts: dict, metrics: dict):
+    """Durably record one completed evaluation."""
+    if not _active:
+        return
+    line = json.dumps(
+        {"key": _key(genes, opts), "metrics": metrics},
+        default=lambda v: v.tolist(),
+    ) + "\n"
+    with _lock:
+        JOURNAL_FILE.parent.mkdir(exist_ok=True)
+        fd = os.open(JOURNAL_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode())
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def truncate():
+    """Drop every entry: a checkpoint now holds these results (or the run restarts)."""
+    with _lock:
+        _entries.clear()
+        if JOURNAL_FILE.exists():
+            JOURNAL_FILE.unlink()
@@ -0,0 +1,141 @@
+"""
+net_info.py
+Static network information read directly from the SUMO input files.
+No simulation is started — everything here comes from parsing XML
+once and caching the result for the lifetime of the process.
+
+  - Resolving the net/route files referenced by a .sumocfg
+  - Content fingerprint of a network (cache keys for on-disk artifacts)
+  - Incoming (controlled) lanes of the signalized intersections
+  - Static traffic-light programs (<tlLogic>) as defined in the net file
+"""
+
+import hashlib
+import xml.etree.ElementTree as ET
+from functools import lru_cache
+from pathlib import Path
+
+from config import SUMOCFG
+
+
+# ============================================================
+# SUMOCFG INPUTS
+# ============================================================
+
+def config_inputs(sumocfg: Path = SUMOCFG) -> dict:
+    """
+    Read the <input> section of a .sumocfg.
+
+    Relative paths are resolved against the config's folder, the same
+    way SUMO resolves them.
+
+    Returns:
+        dict: { "net-file": [Path], "route-files": [Path, ...], ... }
+    """
+    sumocfg = Path(sumocfg)
+    root    = ET.parse(sumocfg).getroot()
+    inputs  = {}
+    for elem in root.iter():
+        value = elem.get("value")
+        if value is None or elem.tag not in (
+            "net-file", "route-files", "additional-files"
+        ):
+            continue
+        inputs[elem.tag] = [
+            (sumocfg.parent / p.strip()).resolve()
+            for p in value.split(",") if p.strip()
+        ]
+    return inputs
+
+
+def net_file(sumocfg: Path = SUMOCFG) -> Path:
+    """Path to the .net.xml referenced by the given .sumocfg."""
+    files = config_inputs(sumocfg).get("net-file")
+    if not files:
+        raise ValueError(f"No <net-file> entry in {sumocfg}")
+    return files[0]
+
+
+@lru_cache(maxsize=None)
+def input_fingerprint(sumocfg: Path = SUMOCFG) -> str:
+    """
+    SHA-256 over the bytes of the .sumocfg and every file it references.
+
+    Anything cached on disk per network (warm-up snapshots, evaluation
+    results) is keyed by this, so regenerating the network with a
+    build_network script invalidates the cache automatically.
+    """
+    sumocfg = Path(sumocfg)
+    digest  = hashlib.sha256(sumocfg.read_bytes())
+    for tag, paths in sorted(config_inputs(sumocfg).items()):
+        for path in paths:
+            digest.update(tag.encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+# ============================================================
+# INCOMING LANES
+# ============================================================
+
+@lru_cache(maxsize=None)
+def incoming_lanes(tl_ids: tuple, net_path: str) -> tuple:
+    """
+    All lanes that feed a traffic light in tl_ids.
+
+    Taken from the <connection tl="..."> entries of the net file —
+    the same set TraCI reports via trafficlight.getControlledLanes(),
+    without needing a running simulation.
+
+    Args:
+        tl_ids:   traffic light IDs (tuple so the result can be cached)
+        net_path: path to the .net.xml file
+
+    Returns:
+        tuple of lane IDs ("<edge>_<index>"), in net-file order, no duplicates
+    """
+    wanted = set(tl_ids)
+    lanes  = {}
+    for _, elem in ET.iterparse(net_path):
+        if elem.tag == "connection" and elem.get("tl") in wanted:
+            lanes[f"{elem.get('from')}_{elem.get('fromLane')}"] = None
+        elem.clear()
+
+    if not lanes:
+        raise RuntimeError(
+            f"No controlled lanes found for {len(wanted)} traffic lights "
+            f"in {net_path}. Verify network generation."
+        )
+    return tuple(lanes)
+
+
+# ============================================================
+# TRAFFIC LIGHT PROGRAMS
+# ============================================================
+
+@lru_cache(maxsize=None)
+def tl_programs(net_path: str) -> dict:
+    """
+    Every <tlLogic> in the net file.
+
+    Args:
+        net_path: path to the .net.xml file
+
+    Returns:
+        dict: { tl_id: { "type": str, "programID": str, "offset": str,
+                         "phases": [(duration, state), ...] } }
+    """
+    programs = {}
+    for _, elem in ET.iterparse(net_path):
+        if elem.tag == "tlLogic":
+            programs[elem.get("id")] = {
+                "type":      elem.get("type", "static"),
+                "programID": elem.get("programID", "0"),
+                "offset":    elem.get("offset", "0"),
+                "phases":    [
+                    (float(ph.get("duration")), ph.get("state"))
+                    for ph in elem.iter("phase")
+                ],
+            }
+            elem.clear()
+    return programs
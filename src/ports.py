@@ -0,0 +1,104 @@
+"""
+ports.py
+Host-wide TraCI port leases.
+
+Several optimizations, baselines and benchmarks may run on one machine
+at the same time, each with its own worker pool. A fixed BASE_PORT +
+index scheme makes them collide. Instead, every process leases the
+ports it listens on:
+
+  1. A lease is an exclusive OS lock on PORT_LOCK_DIR/<port>.lock
+     (flock on POSIX, msvcrt on Windows), held for as long as the
+     port is in use. The OS drops the lock when the process dies, so
+     a crashed job never leaves a port reserved.
+  2. A locked port is only handed out if it can also be bound right
+     now — this skips ports held by programs that know nothing about
+     the lock files (another SUMO, an old TIME_WAIT socket, ...).
+
+Ports are searched in [BASE_PORT, BASE_PORT + PORT_SPAN), starting at
+a process-dependent offset so concurrent workers rarely contend for
+the same lock.
+
+Usage:
+    port = lease_port()
+    ...  # start SUMO on port
+    release_port(port)
+"""
+
+import os
+import socket
+
+from config import BASE_PORT, PORT_SPAN, PORT_LOCK_DIR
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+# Open lock files of the ports this process holds: port -> file object
+_leases = {}
+
+
+def _try_lock(f) -> bool:
+    """Take an exclusive non-blocking lock on an open file."""
+    try:
+        if os.name == "nt":
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def port_is_free(port: int) -> bool:
+    """True if nothing is listening on (or bound to) localhost:port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        try:
+            s.bind(("localhost", port))
+        except OSError:
+            return False
+    return True
+
+
+def lease_port() -> int:
+    """
+    Lease a free TraCI port for this process.
+
+    Returns:
+        port number, held until release_port(port) or process exit
+
+    Raises:
+        RuntimeError if every port in the range is leased or busy
+    """
+    PORT_LOCK_DIR.mkdir(parents=True, exist_ok=True)
+    start = os.getpid() % PORT_SPAN
+    for i in range(PORT_SPAN):
+        port = BASE_PORT + (start + i) % PORT_SPAN
+        if port in _leases:
+            continue
+        f = open(PORT_LOCK_DIR / f"{port}.lock", "a+")
+        if _try_lock(f) and port_is_free(port):
+            _leases[port] = f
+            return port
+        # Leased elsewhere or bound by another program: unlock and move on
+        f.close()
+    raise RuntimeError(
+        f"No free TraCI port in [{BASE_PORT}, {BASE_PORT + PORT_SPAN}) — "
+        f"raise PORT_SPAN or stop other jobs."
+    )
+
+
+def release_port(port: int):
+    """Give a leased port back (no-op if this process does not hold it)."""
+    f = _leases.pop(port, None)
+    if f is not None:
+        # Closing the file releases the lock; the file itself stays so
+        # other processes never race on creating and deleting it
+        f.close()
+
+
+def release_all():
+    """Release every port this process holds."""
+    for port in list(_leases):
+        release_port(port)
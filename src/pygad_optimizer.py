@@ -4,40 +4,106 @@ Runs the Genetic Algorithm using PyGAD to optimize traffic signal
 timings across the SUMO network defined in config.py.
 
 Key architecture decisions:
-  - fitness_func defined at module top level (required for Windows
-    multiprocessing pickling — closures cannot be pickled)
   - 12 parallel SUMO workers evaluate the full population simultaneously,
     reducing per-generation time from ~120min to ~10-15min
-  - File-based worker cache (worker_cache/) for inter-process results
-  - best_result.json tracks best fitness so on_generation needs no
-    extra re-simulation
+  - The workers live for the whole run (worker_pool.py); PyGAD runs in
+    the main process and hands each generation to fitness_func as one
+    batch. With PERSISTENT_WORKERS they also reload SUMO between
+    candidates instead of relaunching it
+  - With N_SEEDS > 1 every candidate is scored on the same seeds
+    (common random numbers); each (candidate, seed) run is its own
+    pool task and fitness is the mean over seeds. With RACING, seeds
+    are added adaptively, only where a candidate's rank relative to the
+    selection cutoff is still uncertain (racing.py)
+  - With SURROGATE, a Gaussian process trained on every simulated
+    result picks which offspring are worth simulating (surrogate.py)
+  - Every evaluation's metrics come back to the main process with its
+    fitness, so on_generation logs the generation best without shared
+    files and without any extra re-simulation
   - Checkpoint/resume: saves population state after each generation
     so interrupted runs can continue from where they left off
 """
 
 import os
+import sys
 import csv
 import json
+import math
+import random
 import multiprocessing
 from pathlib import Path
 
+import numpy as np
 import pygad
-from eval_timings import evaluate, evaluate_worker, fitness, TL_IDS, N_INTERSECTIONS
+import surrogate
+import journal
+from ga_ops import make_offspring, random_population
+from worker_pool import start_pool, evaluate_replicates, close_pool
+from racing import race
+from chromosome import decode, n_genes
+from eval_timings import (
+    evaluate, ensure_snapshot, fitness, mean_metrics, program_templates,
+    TL_IDS, N_INTERSECTIONS,
+)
 
 # Import all constants from central config 
 from config import (
     GREEN_MIN, GREEN_MAX,
-    POP_SIZE, GENERATIONS, ALPHA,
-    CACHE_DIR, CHECKPOINT_DIR, CHECKPOINT_FILE, GA_HISTORY_CSV,
+    POP_SIZE, GENERATIONS, ALPHA, WARMUP_STEPS, SEEDS,
+    RACING, RACE_BUDGET, RACE_SEEDS, RACE_MIN_SEEDS, OPTIMIZER,
+    SURROGATE, SURROGATE_POOL, SURROGATE_EXPLORE,
+    SURROGATE_MIN_TRAIN, SURROGATE_MAX_TRAIN,
+    SCREEN_FIDELITY, SCREEN_KEEP, EARLY_ABORT, ABORT_MARGIN,
+    TRACE_EVERY, DEBUG_CACHE, TARGET_AVG_WAIT, ENCODING,
+    CACHE_DIR, CHECKPOINT_DIR, CHECKPOINT_FILE, GA_HISTORY_CSV, GA_TRACE_CSV,
 )
 
 # Derived constants 
-# Total genes = 2 per intersection (phase A + phase B)
-N_GENES    = N_INTERSECTIONS * 2
+# Genes searched: 2 per intersection (phase A + phase B) unless ENCODING
+# ties them (chromosome.py). Chromosomes stay encoded everywhere in this
+# process — `results` keys, populations, checkpoints — and are decoded
+# only for display, ga_history.csv and the final GUI run.
+N_GENES    = n_genes(ENCODING)
 
 # Gene space: each gene is a continuous value in [GREEN_MIN, GREEN_MAX]
 gene_space = [{"low": GREEN_MIN, "high": GREEN_MAX}] * N_GENES
 
+# Every result of this run, keyed by integer chromosome:
+#   tuple(genes) -> (fitness, metrics)
+# Filled by record_result() in the main process only, so there is no
+# cross-process contention. PyGAD only ever holds fitness values that
+# passed through here, so on_generation() always finds its best.
+results = {}
+
+# Per-generation evaluation statistics, logged to ga_history.csv by
+# log_generation() and then reset. Filled in by record_result().
+HISTORY_STATS = [
+    "evaluations", "simulations", "sim_seconds", "aborted", "gridlocks", "steps_saved",
+    "cache_hits", "cache_hit_rate",
+    "surrogate_rejected", "sims_saved", "surrogate_rho", "surrogate_mae",
+]
+gen_stats     = dict.fromkeys(HISTORY_STATS, 0)
+
+# Surrogate model (SURROGATE), refit by on_mutation() every generation.
+# Its predictions for candidates that are then simulated are paired with
+# the simulated fitness and scored in log_generation().
+_surrogate       = None
+_surrogate_train = []   # (genes, fitness) pairs of the last fit, checkpointed
+_surrogate_pairs = []   # (predicted, simulated) fitness, this generation
+_rng             = np.random.default_rng()
+
+# Fitness of a resumed population, restored from the checkpoint: PyGAD
+# scores its initial population before the first generation, and
+# fitness_func answers that batch from here instead of simulating it.
+_resumed = {}   # tuple(genes) -> fitness
+
+# Simulations used this run (all generations), for TARGET_AVG_WAIT;
+# set to -1 once the target has been reported
+_sims_total = 0
+
+# Per-seed spread of the generation best, logged next to its fitness
+SEED_STATS = ["seeds", "seed_fitness_std", "seed_fitness_min", "seed_fitness_max"]
+
 
 # ============================================================
 # CHECKPOINT HELPERS
@@ -46,53 +112,169 @@ gene_space = [{"low": GREEN_MIN, "high": GREEN_MAX}] * N_GENES
 # it restarts at where it left off and runs 7 more simulations.
 # ============================================================
 
-def save_checkpoint(generation: int, population: list, best_fitness: float):
+def save_checkpoint(
+    generation:   int,
+    population:   list,
+    best_fitness: float,
+    extra:        dict = None,
+    fitness:      list = None,
+    rngs:         dict = None,
+):
     """
     Save current population state to checkpoints/checkpoint.json.
 
     Called at the end of every generation so any interruption
-    loses at most one generation of work.
+    loses at most one generation of work. Besides the population the
+    checkpoint holds what an exact resume needs:
+      - the fitness and metrics of every member (and of the best result
+        so far), restored into `results` by load_checkpoint() so nothing
+        is simulated again. With SURROGATE (GA), every result in `results`
+        order: on_mutation() trains on them and skips candidates already
+        simulated
+      - the surrogate's last training set, so it is refit unchanged
+      - gen_stats and the simulation count behind TARGET_AVG_WAIT
+      - the state of the run's random generators
+    The file is written under a temporary name and renamed, so a crash
+    mid-write leaves the previous checkpoint intact.
 
     Args:
         generation:   generations completed so far
         population:   list of 12 chromosomes (each a list of ints)
         best_fitness: best fitness score seen so far
+        extra:        optional mode-specific fields stored alongside
+        fitness:      fitness of each population member (PyGAD's
+                      last_generation_fitness)
+        rngs:         {name: generator} to restore with restore_rngs()
     """
+    if SURROGATE and (extra or {}).get("optimizer", "ga") == "ga":
+        keep = set(results)
+    else:
+        keep = {tuple(int(g) for g in chrom) for chrom in population}
+        if results:
+            keep.add(max(results, key=lambda k: results[k][0]))
+
     CHECKPOINT_DIR.mkdir(exist_ok=True)
     checkpoint = {
         "generation":   generation,
         "population":   [list(map(int, chrom)) for chrom in population],
         "best_fitness": best_fitness,
+        "encoding":     ENCODING,
+        "fitness":      None if fitness is None else [float(f) for f in fitness],
+        "results":      [[list(k), *v] for k, v in results.items() if k in keep],
+        "surrogate":    [[list(g), f] for g, f in _surrogate_train],
+        "gen_stats":    dict(gen_stats),
+        "sims_total":   _sims_total,
+        "rng_state":    {name: _rng_state(gen) for name, gen in (rngs or {}).items()},
+        **(extra or {}),
     }
-    CHECKPOINT_FILE.write_text(json.dumps(checkpoint, indent=2))
+    tmp = CHECKPOINT_FILE.with_name(f".{os.getpid()}.{CHECKPOINT_FILE.name}")
+    with open(tmp, "w") as f:
+        f.write(json.dumps(checkpoint, indent=2, default=_to_json))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, CHECKPOINT_FILE)
+    # The checkpoint now holds every result the journal was covering
+    journal.truncate()
     print(f"[Checkpoint] Saved at generation {generation}")
 
 
-def load_checkpoint() -> dict | None:
+def load_checkpoint(optimizer: str = "ga") -> dict | None:
     """
-    Load checkpoint from disk if one exists.
+    Load checkpoint from disk if one exists, and restore the saved
+    results (fitness + metrics) into `results`, the surrogate (refit on
+    its saved training set), gen_stats and the simulation count.
+
+    Args:
+        optimizer: OPTIMIZER mode resuming; a checkpoint written by
+                   another mode is ignored (the run starts fresh)
 
     Returns:
-        dict with keys: generation, population, best_fitness
-        None if no checkpoint exists
+        dict with keys: generation, population, best_fitness, fitness,
+        results, rng_state (plus any mode-specific extra fields)
+        None if no usable checkpoint exists
     """
+    global _surrogate, _surrogate_train, _sims_total
     if not CHECKPOINT_FILE.exists():
         return None
     try:
         checkpoint = json.loads(CHECKPOINT_FILE.read_text())
+        if checkpoint.get("optimizer", "ga") != optimizer:
+            print(f"[Checkpoint] Found a '{checkpoint.get('optimizer', 'ga')}' checkpoint, "
+                  f"running '{optimizer}'. Starting fresh.")
+            return None
+        if checkpoint.get("encoding", "independent") != ENCODING:
+            print(f"[Checkpoint] Saved with ENCODING '{checkpoint.get('encoding', 'independent')}', "
+                  f"running '{ENCODING}'. Starting fresh.")
+            return None
+        for genes, f, m in checkpoint.get("results", []):
+            results[tuple(genes)] = (f, m)
+        _surrogate_train = [(tuple(g), f) for g, f in checkpoint.get("surrogate", [])]
+        if _surrogate_train:
+            _surrogate = surrogate.fit([g for g, _ in _surrogate_train],
+                                       [f for _, f in _surrogate_train])
+        gen_stats.update(checkpoint.get("gen_stats", {}))
+        _sims_total = checkpoint.get("sims_total", 0)
         print(f"[Checkpoint] Resuming from generation {checkpoint['generation']} "
-              f"(best fitness so far: {checkpoint['best_fitness']:.2f})")
+              f"(best fitness so far: {checkpoint['best_fitness']:.2f}, "
+              f"{len(checkpoint.get('results', []))} results restored)")
         return checkpoint
     except Exception as e:
         print(f"[Checkpoint] Failed to load checkpoint: {e}. Starting fresh.")
         return None
 
 
+def restore_rngs(checkpoint: dict, rngs: dict):
+    """Set each generator in {name: generator} to its checkpointed state."""
+    for name, gen in rngs.items():
+        saved = checkpoint.get("rng_state", {}).get(name)
+        if saved is None:
+            continue
+        if isinstance(gen, np.random.Generator):
+            gen.bit_generator.state = saved
+        elif isinstance(gen, np.random.RandomState):
+            kind, keys, pos, has_gauss, cached = saved
+            gen.set_state((kind, np.asarray(keys, dtype=np.uint32), pos, has_gauss, cached))
+        else:   # random.Random
+            version, internal, gauss = saved
+            gen.setstate((version, tuple(internal), gauss))
+
+
+def _rng_state(gen):
+    """JSON-serializable state of a NumPy Generator/RandomState or random.Random."""
+    if isinstance(gen, np.random.Generator):
+        return gen.bit_generator.state
+    if isinstance(gen, np.random.RandomState):
+        kind, keys, pos, has_gauss, cached = gen.get_state()
+        return [kind, keys.tolist(), pos, has_gauss, cached]
+    version, internal, gauss = gen.getstate()
+    return [version, list(internal), gauss]
+
+
+def _to_json(value):
+    """json.dumps fallback for NumPy scalars and arrays inside metrics."""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def _ga_rngs(ga_instance) -> dict:
+    """
+    Random generators of a GA run: PyGAD's own (per instance since
+    PyGAD 2.18 — the NumPy/random globals before) and the surrogate's.
+    """
+    return {
+        "numpy":     getattr(ga_instance, "numpy_random_generator", np.random.mtrand._rand),
+        "python":    getattr(ga_instance, "python_random_generator", random._inst),
+        "surrogate": _rng,
+    }
+
+
 def clear_checkpoint():
     """
     Delete the checkpoint file after a successful run completes.
     This ensures the next run starts fresh rather than resuming.
     """
+    journal.truncate()
     if CHECKPOINT_FILE.exists():
         CHECKPOINT_FILE.unlink()
         print("[Checkpoint] Cleared — next run will start fresh.")
@@ -100,62 +282,276 @@ def clear_checkpoint():
 
 # ============================================================
 # FITNESS FUNCTION
-# Must be defined at module top level (not inside run_ga or any
-# other function) so Python's multiprocessing can pickle it for
-# dispatch to worker processes on Windows.
+# PyGAD calls this in the main process with the whole batch
+# (fitness_batch_size=POP_SIZE); the simulations run on worker_pool.
 # ============================================================
 
-def fitness_func(ga_instance, solution, solution_idx):
+def fitness_func(ga_instance, solutions, solution_indices):
     """
-    Evaluate one candidate timing plan by running a SUMO simulation.
+    Evaluate a batch of candidate timing plans by running SUMO simulations.
 
-    Called by PyGAD for every member of the population each generation.
-    With parallel_processing=["process", 12], all 12 calls happen
-    simultaneously in separate processes.
+    Called by PyGAD once per generation with every member that needs a
+    score (and again for offspring during adaptive mutation). The batch
+    is fanned out to the long-lived workers, one task per (candidate,
+    seed); each result returns here with its metrics, which
+    record_result() keeps for on_generation().
 
     Args:
-        ga_instance:  PyGAD GA instance (provided by framework, not used directly)
-        solution:     numpy array of gene values for this candidate
-        solution_idx: index of this candidate in the population (0-11)
+        ga_instance:      PyGAD GA instance
+        solutions:        sequence of numpy gene arrays
+        solution_indices: population indices (None during adaptive mutation)
 
     Returns:
-        float: fitness score (higher = better timing plan)
+        list of float fitness scores (higher = better timing plan)
     """
-    if solution_idx is None:
-        solution_idx = 0
+    genes_list = [[int(x) for x in solution] for solution in solutions]
+
+    # First batch after a resume: the restored population, already scored
+    if _resumed and solution_indices is not None \
+            and all(tuple(g) in _resumed for g in genes_list):
+        fits = [_resumed[tuple(g)] for g in genes_list]
+        _resumed.clear()
+        return fits
+
+    predicted  = None
+    if _surrogate is not None:
+        predicted = surrogate.predict(_surrogate, genes_list)[0]
+        if solution_indices is None:
+            # Adaptive mutation only compares un-mutated offspring with
+            # the population mean — the model answers, SUMO is not run
+            runs = RACE_MIN_SEEDS if RACING else len(SEEDS)
+            gen_stats["sims_saved"] += len(genes_list) * runs
+            return [float(f) for f in predicted]
+
+    opts = {"abort_below": _abort_bound(ga_instance), "trace": TRACE_EVERY}
+    if SCREEN_FIDELITY and len(genes_list) > 1:
+        fits = _screened_fitness(genes_list, opts, ga_instance)
+    else:
+        batch = _evaluate(genes_list, opts, ga_instance)
+        _report_aborts(batch)
+        fits  = [record_result(genes, m) for genes, m in zip(genes_list, batch)]
 
-    genes = [int(x) for x in solution]
-    args  = (solution_idx % POP_SIZE, genes, None)
-    m     = evaluate_worker(args)
-    f     = fitness(m, alpha=ALPHA)
+    if predicted is not None:
+        _surrogate_pairs.extend(zip(predicted, fits))
+    return fits
 
-    # Track best result seen this run:
-    # best_result.json stores the metrics of the best simulation
-    # so on_generation() can log without re-running anything.
-    best_file = CACHE_DIR / "best_result.json"
-    try:
-        existing     = json.loads(best_file.read_text()) if best_file.exists() else None
-        existing_fit = existing.get("_fitness", -1e18) if existing else -1e18
-        if f > existing_fit:
-            m["_fitness"] = f
-            best_file.write_text(json.dumps(m))
-    except Exception:
-        # Non-fatal: logging failure should never crash the GA
-        pass
+
+def _evaluate(genes_list: list, opts: dict, ga_instance=None) -> list:
+    """
+    Evaluate a batch on the pool: raced against the selection cutoff
+    when RACING (and ga_instance is given), otherwise under every seed
+    in SEEDS. Simulations used are added to gen_stats.
+
+    Returns:
+        one metrics dict per chromosome, averaged over seeds (mean_metrics)
+    """
+    if RACING and ga_instance is not None:
+        batch, sims = race(
+            genes_list,
+            n_select = ga_instance.keep_elitism or ga_instance.num_parents_mating,
+            budget   = RACE_BUDGET - gen_stats["simulations"],
+            cutoff   = _race_cutoff(ga_instance),
+            opts     = opts,
+        )
+    else:
+        runs  = evaluate_replicates(genes_list, SEEDS, opts)
+        batch = [mean_metrics(r, alpha=ALPHA) for r in runs]
+        sims  = sum(not m.get("cache_hit") for r in runs for m in r)
+    gen_stats["simulations"] += sims
+    return batch
+
+
+def _race_cutoff(ga_instance) -> float | None:
+    """
+    Racing cutoff: the fitness a candidate needs to be kept as an elite
+    of the current population. None before the first generation has
+    been scored (racing then ranks the batch against itself).
+    """
+    last     = getattr(ga_instance, "last_generation_fitness", None)
+    n_select = ga_instance.keep_elitism or ga_instance.num_parents_mating
+    if last is None or len(last) < n_select:
+        return None
+    return float(sorted(last, reverse=True)[n_select - 1])
+
+
+def _abort_bound(ga_instance) -> float | None:
+    """
+    Early-abort bound for this batch: the incumbent (best fitness of the
+    last evaluated generation) minus ABORT_MARGIN of its magnitude.
+    None — never abort — before the first generation has been scored,
+    and with several seeds or RACING: the incumbent is a mean over
+    seeds, so one hard seed falling below it proves nothing about the
+    candidate.
+    """
+    last = getattr(ga_instance, "last_generation_fitness", None)
+    if not EARLY_ABORT or len(SEEDS) > 1 or RACING or last is None or len(last) == 0:
+        return None
+    best = float(max(last))
+    return best - ABORT_MARGIN * abs(best)
+
+
+def _report_aborts(results: list):
+    """Print how many candidates in a batch were stopped early."""
+    aborted = [m for m in results if m.get("truncated")]
+    if aborted:
+        print(f"[Abort] {len(aborted)}/{len(results)} candidates stopped early, "
+              f"{sum(m['steps_saved'] for m in aborted)} steps saved")
+
+
+def _screened_fitness(genes_list: list, opts: dict, ga_instance=None) -> list:
+    """
+    Multi-fidelity screening: evaluate the batch at SCREEN_FIDELITY,
+    re-run only the top SCREEN_KEEP fraction at full fidelity.
+
+    Screened-out candidates get a rank-preserving estimate placed below
+    the worst promoted candidate: its full fitness minus their
+    low-fidelity shortfall relative to it. They can therefore never be
+    selected as elites ahead of a fully evaluated candidate.
+    """
+    low     = _evaluate(genes_list, {"fidelity": SCREEN_FIDELITY})
+    low_fit = [fitness(m, alpha=ALPHA) for m in low]
+    order   = sorted(range(len(genes_list)), key=lambda i: low_fit[i], reverse=True)
+    keep    = order[:max(1, math.ceil(SCREEN_KEEP * len(genes_list)))]
+
+    full = _evaluate([genes_list[i] for i in keep], opts, ga_instance)
+    _report_aborts(full)
+    fits = [None] * len(genes_list)
+    for i, m in zip(keep, full):
+        fits[i] = record_result(genes_list[i], m)
+
+    # Anchor for the estimates: worst promoted candidate
+    anchor = min(keep, key=lambda i: fits[i])
+    for i in order[len(keep):]:
+        estimate = fits[anchor] - (low_fit[anchor] - low_fit[i])
+        fits[i]  = record_result(genes_list[i], low[i], f=estimate)
+
+    low_cost  = sum(m["wall_time"] for m in low)
+    full_cost = sum(m["wall_time"] for m in full)
+    print(f"[Screen] {SCREEN_FIDELITY}: {len(genes_list)} evaluated "
+          f"({low_cost:.0f}s), {len(keep)} promoted to full ({full_cost:.0f}s)")
+    return fits
+
+
+def record_result(genes: list, m: dict, f: float = None) -> float:
+    """
+    Score one simulation result, keep it in `results`, print a summary.
+
+    Args:
+        genes: evaluated chromosome
+        m:     metrics dict from evaluate()
+        f:     fitness override (screening estimates); default fitness(m)
+    """
+    if f is None:
+        f = fitness(m, alpha=ALPHA)
+
+    gen_stats["evaluations"] += 1
+    if m.get("cache_hit"):
+        gen_stats["cache_hits"] += 1
+    else:
+        gen_stats["sim_seconds"] += m.get("wall_time", 0.0)
+    gen_stats["steps_saved"] += m.get("steps_saved", 0)
+    if m.get("gridlock"):
+        gen_stats["gridlocks"] += 1
+    elif m.get("truncated"):
+        gen_stats["aborted"] += 1
+
+    # A screening estimate never replaces a full-fidelity result
+    key = tuple(genes)
+    if m.get("fidelity", "full") == "full" or key not in results:
+        results[key] = (f, m)
 
     # Print compact summary showing first 3 intersections
-    g = genes
+    g = decode(genes)
     print(
         f"[GA] J_0_0=({g[0]},{g[1]}) J_1_0=({g[2]},{g[3]}) J_2_0=({g[4]},{g[5]}) ... | "
         f"arr={m['arrived_total']} wait={m['total_wait']:.0f} fit={f:.2f}"
     )
     return f
 
+
+def score_population(genes_list: list, incumbent: float = None) -> list:
+    """
+    Fitness of a batch of chromosomes, for the optimizer modes that do
+    not run through PyGAD (islands, coevolution, engines).
+
+    Chromosomes already in `results` are not simulated again; the rest
+    go to the pool as one batch, each under every seed in SEEDS, and are
+    recorded with record_result().
+
+    Args:
+        genes_list: flat integer gene lists
+        incumbent:  fitness to beat, for the early-abort bound
+                    (None = no early abort)
+
+    Returns:
+        fitness of each chromosome, in the order of genes_list
+    """
+    todo = list({tuple(g): list(g) for g in genes_list if tuple(g) not in results}.values())
+    if todo:
+        opts = {"trace": TRACE_EVERY}
+        if EARLY_ABORT and len(SEEDS) == 1 and incumbent is not None:
+            opts["abort_below"] = incumbent - ABORT_MARGIN * abs(incumbent)
+        runs = evaluate_replicates(todo, SEEDS, opts)
+        gen_stats["simulations"] += sum(not m.get("cache_hit") for r in runs for m in r)
+        batch = [mean_metrics(r, alpha=ALPHA) for r in runs]
+        _report_aborts(batch)
+        for genes, m in zip(todo, batch):
+            record_result(genes, m)
+    return [results[tuple(g)][0] for g in genes_list]
+
+# ============================================================
+# SURROGATE PRE-SCREENING
+# Called by PyGAD after mutation, before the offspring are simulated.
+# ============================================================
+
+def on_mutation(ga_instance, offspring):
+    """
+    Refit the surrogate on every simulated result, then refill the
+    offspring slots with the candidates it rates highest (or is most
+    uncertain about) out of SURROGATE_POOL candidates per slot.
+
+    Edits offspring in place: PyGAD builds the next population from
+    this array. No-op until SURROGATE_MIN_TRAIN results exist.
+    """
+    global _surrogate, _surrogate_train
+    if not SURROGATE:
+        return
+
+    # Full-fidelity results only; early-aborted runs carry a bound,
+    # not their fitness (gridlocks are real outcomes and stay)
+    train = [
+        (genes, f) for genes, (f, m) in results.items()
+        if m.get("fidelity", "full") == "full"
+        and not (m.get("truncated") and not m.get("gridlock"))
+    ][-SURROGATE_MAX_TRAIN:]
+    if len(train) < SURROGATE_MIN_TRAIN:
+        return
+    _surrogate       = surrogate.fit([g for g, _ in train], [f for _, f in train])
+    _surrogate_train = train
+
+    # The PyGAD offspring plus fresh ones bred the same way
+    population = np.asarray(ga_instance.population, dtype=int)
+    pop_fit    = np.asarray(ga_instance.last_generation_fitness, dtype=float)
+    n_slots    = len(offspring)
+    candidates = [[int(x) for x in child] for child in offspring]
+    while len(candidates) < n_slots * SURROGATE_POOL:
+        candidates.append(make_offspring(population, pop_fit, _rng).tolist())
+
+    # Never spend a slot on a duplicate or an already simulated plan
+    unique = list({tuple(c): c for c in candidates if tuple(c) not in results}.values())
+    if len(unique) < n_slots:
+        return
+    mean, std = surrogate.predict(_surrogate, unique)
+    chosen    = surrogate.select(mean, std, n_slots, SURROGATE_EXPLORE)
+    offspring[:] = np.asarray([unique[i] for i in chosen])
+    gen_stats["surrogate_rejected"] += len(unique) - n_slots
+
+
 # ============================================================
 # GENERATION CALLBACK
 # Called by PyGAD after every generation completes.
 # Logs results to ga_history.csv and saves a checkpoint.
-# Does NOT re-run any simulation; reads from best_result.json.
+# Does NOT re-run any simulation; reads the metrics kept in `results`.
 # ============================================================
 
 def on_generation(ga_instance):
@@ -171,21 +567,71 @@ def on_generation(ga_instance):
     )
     genes = [int(x) for x in best_solution]
 
-    # ── Read metrics from cache (no extra simulation)
-    best_file = CACHE_DIR / "best_result.json"
-    try:
-        metrics = json.loads(best_file.read_text())
-    except Exception:
-        # Fallback: only if cache is missing or corrupt
-        print(f"[Log] Gen {generation}: cache miss, re-evaluating...")
-        metrics = evaluate(genes, gui=False, verbose=False)
+    # Metrics of the generation best came back with its fitness
+    _, metrics = results[tuple(genes)]
+    log_generation(generation, genes, best_fit, metrics)
+
+    # Save checkpoint after every generation:
+    # If the run is interrupted, the next run will resume from here
+    # rather than restarting from generation 1.
+    save_checkpoint(
+        generation   = generation,
+        population   = ga_instance.population.tolist(),
+        best_fitness = best_fit,
+        fitness      = ga_instance.last_generation_fitness,
+        rngs         = _ga_rngs(ga_instance),
+    )
+
 
+def log_generation(generation: int, genes: list, best_fit: float, metrics: dict):
+    """
+    Print the generation summary, append it to ga_history.csv (and the
+    best's trace to ga_trace.csv), then reset gen_stats.
+
+    Shared by every optimizer mode; steady-state runs log one
+    "generation" per POP_SIZE completed evaluations.
+
+    Args:
+        generation: generation number (or evaluations // POP_SIZE)
+        genes:      best chromosome so far
+        best_fit:   its fitness
+        metrics:    its metrics dict
+    """
+    global _sims_total
     throughput = metrics["arrived_total"]
     total_wait = metrics["total_wait"]
     avg_wait   = total_wait / throughput if throughput > 0 else 0.0
+    seed_fit   = metrics.get("seed_fitness", [best_fit])
+    seed_row   = [len(seed_fit), metrics.get("fitness_std", 0.0), min(seed_fit), max(seed_fit)]
 
     print(f" >> [Log] Gen {generation}: fit={best_fit:.2f} "
           f"arrived={throughput} avg_wait={avg_wait:.1f}s")
+    if len(seed_fit) > 1:
+        print(f" >> [Log] Gen {generation}: {len(seed_fit)} seeds, "
+              f"fit std={seed_row[1]:.2f} range=[{seed_row[2]:.2f}, {seed_row[3]:.2f}]")
+    if gen_stats["evaluations"]:
+        gen_stats["cache_hit_rate"] = gen_stats["cache_hits"] / gen_stats["evaluations"]
+        print(f" >> [Log] Gen {generation}: {gen_stats['cache_hits']}/"
+              f"{gen_stats['evaluations']} evaluations served from cache")
+    print(f" >> [Log] Gen {generation}: {gen_stats['simulations']} simulations used")
+    if _sims_total >= 0:
+        _sims_total += gen_stats["simulations"]
+        if TARGET_AVG_WAIT and throughput and avg_wait <= TARGET_AVG_WAIT:
+            print(f" >> [Log] Gen {generation}: target avg_wait {TARGET_AVG_WAIT:.1f}s "
+                  f"reached after {_sims_total} simulations")
+            _sims_total = -1
+    if _surrogate_pairs:
+        predicted, actual = zip(*_surrogate_pairs)
+        gen_stats["surrogate_rho"] = surrogate.rank_correlation(predicted, actual)
+        gen_stats["surrogate_mae"] = float(np.mean(np.abs(np.subtract(predicted, actual))))
+        _surrogate_pairs.clear()
+    if SURROGATE:
+        print(f" >> [Log] Gen {generation}: surrogate rho={gen_stats['surrogate_rho']:.2f} "
+              f"mae={gen_stats['surrogate_mae']:.2f}, {gen_stats['surrogate_rejected']} "
+              f"candidates rejected, {gen_stats['sims_saved']} simulations saved")
+    if gen_stats["gridlocks"] or gen_stats["aborted"]:
+        print(f" >> [Log] Gen {generation}: {gen_stats['gridlocks']} gridlocked, "
+              f"{gen_stats['aborted']} aborted — {gen_stats['steps_saved']} steps saved")
 
     # Write to ga_history.csv 
     # Headers are built dynamically so this works for any network size
@@ -193,6 +639,7 @@ def on_generation(ga_instance):
     tl_headers += [f"green_{tl_id}_B" for tl_id in TL_IDS]
 
     # Reorder genes to match headers: all A values then all B values
+    genes   = decode(genes)
     genes_a = [genes[i * 2]     for i in range(N_INTERSECTIONS)]
     genes_b = [genes[i * 2 + 1] for i in range(N_INTERSECTIONS)]
     gene_row = genes_a + genes_b
@@ -203,20 +650,70 @@ def on_generation(ga_instance):
         if not file_exists:
             writer.writerow(
                 ["generation", "fitness", "avg_waiting_time", "throughput"]
-                + tl_headers
+                + SEED_STATS + HISTORY_STATS + tl_headers
             )
         writer.writerow(
-            [generation, best_fit, avg_wait, throughput] + gene_row
+            [generation, best_fit, avg_wait, throughput]
+            + seed_row + [gen_stats[k] for k in HISTORY_STATS] + gene_row
         )
+    gen_stats.update(dict.fromkeys(HISTORY_STATS, 0))
+
+    # Per-step trace of the generation best (TRACE_EVERY > 0)
+    if metrics.get("trace"):
+        file_exists = GA_TRACE_CSV.exists()
+        with open(GA_TRACE_CSV, "a", newline="") as f:
+            writer = csv.writer(f)
+            if not file_exists:
+                writer.writerow(
+                    ["generation", "step", "vehicles", "waiting", "arrived_total", "total_wait"]
+                )
+            writer.writerows([generation] + row for row in metrics["trace"])
+
+
+# ============================================================
+# RUN SETUP
+# Shared by every optimizer mode.
+# ============================================================
+
+def reset_logs():
+    """Delete the logs of a previous run so a fresh run starts clean."""
+    # Clear stale debug dumps from any previous run
+    if DEBUG_CACHE and CACHE_DIR.exists():
+        for f in CACHE_DIR.glob("*.json"):
+            f.unlink()
+
+    # Delete old ga_history.csv / ga_trace.csv
+    for old_log in (GA_HISTORY_CSV, GA_TRACE_CSV):
+        if old_log.exists():
+            old_log.unlink()
+
+    # Evaluations journaled by an abandoned run belong to its population
+    journal.truncate()
+
+
+def prepare_simulations():
+    """
+    One-off work in the main process before the workers start:
+    network templates, warm-up snapshots, seed configuration summary,
+    and the evaluation journal (replaying what a crashed run finished).
+    """
+    journal.start()
+
+    # Read and validate the traffic-light templates once; forked workers
+    # inherit them and spawned ones read the on-disk copy
+    program_templates()
+
+    # Build the shared warm-up snapshots (one per seed) once, before the
+    # workers start, so they all load them instead of racing to simulate
+    if WARMUP_STEPS > 0:
+        for seed in (RACE_SEEDS if RACING else SEEDS):
+            print(f"[Config] Warm start: {WARMUP_STEPS} steps -> {ensure_snapshot(seed=seed)}")
+    if RACING:
+        print(f"[Config] Racing: {len(RACE_SEEDS)} seeds max per candidate, "
+              f"{RACE_BUDGET} simulations per generation")
+    elif len(SEEDS) > 1:
+        print(f"[Config] Common random numbers: {len(SEEDS)} seeds per candidate {SEEDS}")
 
-    # Save checkpoint after every generation:
-    # If the run is interrupted, the next run will resume from here
-    # rather than restarting from generation 1.
-    save_checkpoint(
-        generation  = generation,
-        population  = ga_instance.population.tolist(),
-        best_fitness= best_fit,
-    )
 
 # MAIN RUN FUNCTION
 
@@ -225,8 +722,9 @@ def run_ga():
     Initialize and run the GA, with checkpoint/resume support.
 
     On startup:
-      - If a checkpoint exists: load saved population and resume
-        from the next generation (remaining = GENERATIONS - completed)
+      - If a checkpoint exists: load saved population, its fitness and
+        RNG state, and resume from the next generation (remaining =
+        GENERATIONS - completed) without re-simulating the population
       - If no checkpoint: start fresh with random initialization
 
     On completion:
@@ -254,23 +752,22 @@ def run_ga():
         print(f"[Config] Workers: {n_workers}  Population: {POP_SIZE}  "
               f"Genes: {N_GENES}  Intersections: {N_INTERSECTIONS}")
     else:
-        # Fresh start
+        # Fresh start: the initial population is drawn here rather than
+        # by PyGAD so it can be checkpointed as generation 0 (below)
         completed          = 0
         generations_left   = GENERATIONS
-        initial_population = None
+        initial_population = random_population(POP_SIZE, N_GENES, _rng).tolist()
 
         print(f"[Config] Workers: {n_workers}  Population: {POP_SIZE}  "
               f"Generations: {GENERATIONS}  Genes: {N_GENES}  "
               f"Intersections: {N_INTERSECTIONS}")
 
-        # Clear stale worker cache files from any previous run
-        if CACHE_DIR.exists():
-            for f in CACHE_DIR.glob("*.json"):
-                f.unlink()
+        reset_logs()
+
+    prepare_simulations()
 
-        # Delete old ga_history.csv so the new run starts clean
-        if GA_HISTORY_CSV.exists():
-            GA_HISTORY_CSV.unlink()
+    # Long-lived workers; PyGAD itself stays in the main process
+    start_pool(n_workers)
 
     # Build GA instance 
     ga_instance = pygad.GA(
@@ -279,10 +776,13 @@ def run_ga():
         sol_per_pop           = POP_SIZE,
         num_genes             = N_GENES,
 
-        fitness_func          = fitness_func,  # must be top-level for pickling
+        # fitness_func receives whole batches and fans them out to
+        # worker_pool, so PyGAD needs no parallel_processing of its own
+        fitness_func          = fitness_func,
+        fitness_batch_size    = POP_SIZE,
         gene_space            = gene_space,
 
-        # initial_population: None = random init, list = resume from checkpoint
+        # initial_population: random (fresh) or restored from the checkpoint
         initial_population    = initial_population,
 
         parent_selection_type = "tournament",
@@ -292,21 +792,52 @@ def run_ga():
         mutation_percent_genes= [40, 10],   # 40% early, 10% late
         keep_elitism          = 3,           # always preserve top 3 solutions
 
-        # parallel_processing: runs all POP_SIZE fitness evaluations
-        # simultaneously using Python multiprocessing.
-        # fitness_func MUST be picklable (top-level) for this to work on Windows.
-        parallel_processing   = ["process", n_workers],
-
         save_best_solutions   = True,
         suppress_warnings     = True,
         on_generation         = on_generation,
+        on_mutation           = on_mutation,
     )
 
+    # Exact resume: PyGAD continues its generation count (so callbacks
+    # and checkpoints keep the global generation number), its random
+    # generators continue from their saved state, and the restored
+    # population is scored from the checkpoint by fitness_func
+    # Fresh runs checkpoint generation 0 before anything is simulated:
+    # a crash during generation 1 then resumes this same population and
+    # the journal replays the evaluations it had finished
+    if checkpoint is None:
+        save_checkpoint(
+            generation   = 0,
+            population   = initial_population,
+            best_fitness = float("-inf"),
+            rngs         = _ga_rngs(ga_instance),
+        )
+    else:
+        ga_instance.generations_completed = completed
+        restore_rngs(checkpoint, _ga_rngs(ga_instance))
+        if checkpoint.get("fitness") is not None:
+            _resumed.update(
+                (tuple(g), f) for g, f in zip(checkpoint["population"], checkpoint["fitness"])
+            )
+
     # Run, then print final best solution
-    ga_instance.run()
-    best_solution, best_fit, _ = ga_instance.best_solution()
-    genes = [int(x) for x in best_solution]
+    try:
+        ga_instance.run()
+    finally:
+        close_pool()
+    # pop_fitness avoids PyGAD re-scoring (re-simulating) the population
+    best_solution, best_fit, _ = ga_instance.best_solution(
+        pop_fitness=ga_instance.last_generation_fitness
+    )
+    finish_run([int(x) for x in best_solution], best_fit)
+
 
+def finish_run(genes: list, best_fit: float):
+    """
+    End of a completed run (any optimizer mode): print the final best
+    solution, clear the checkpoint, re-run the best with SUMO-GUI.
+    """
+    genes = decode(genes)
     print("\n========== FINAL BEST ==========")
     for i, tl_id in enumerate(TL_IDS):
         print(f"  {tl_id}: gA={genes[i*2]}s  gB={genes[i*2+1]}s")
@@ -317,7 +848,7 @@ def run_ga():
 
     # Visualize best solution in SUMO-GUI
     print("\nRe-running best solution with GUI...")
-    evaluate(genes, gui=True, verbose=True)
+    evaluate(genes, gui=True, verbose=True, stop_early=False)
 
 
 # Entry point
@@ -327,4 +858,21 @@ if __name__ == "__main__":
     # startup, causing infinite recursive process spawning and an
     # immediate crash. Must be the first call in the if __name__ block.
     multiprocessing.freeze_support()
-    run_ga()
\ No newline at end of file
+    if OPTIMIZER == "ga":
+        run_ga()
+    elif OPTIMIZER == "steady_state":
+        # Imported here: steady_state builds on this module
+        from steady_state import run_steady_state
+        run_steady_state()
+    elif OPTIMIZER == "islands":
+        from islands import run_islands
+        run_islands()
+    elif OPTIMIZER == "coevolution":
+        from coevolution import run_coevolution
+        run_coevolution()
+    elif OPTIMIZER in ("cmaes", "de"):
+        from engines import run_engine
+        run_engine(OPTIMIZER)
+    else:
+        sys.exit(f"Unknown OPTIMIZER '{OPTIMIZER}'. "
+                 "Options: ga, steady_state, islands, coevolution, cmaes, de")
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+racing.py
+Adaptive replication ("racing") for noisy fitness evaluation.
+
+A fixed number of seeds per candidate spends as much on a clearly bad
+plan as on one at the edge of selection. Racing spends replications
+only where the ranking is still uncertain:
+
+  1. every candidate runs on the first RACE_MIN_SEEDS of RACE_SEEDS
+  2. the selection cutoff is the fitness needed to rank among the
+     n_select best (keep_elitism): the incumbent's n_select-th best
+     fitness when known, otherwise the midpoint between the batch's
+     n_select-th and (n_select+1)-th means
+  3. candidates whose interval mean +- RACE_Z * standard error
+     contains the cutoff get their next seed, closest to the cutoff
+     first; all of them run as one batch on the worker pool
+  4. repeat until no candidate is uncertain, every uncertain candidate
+     has RACE_MAX_SEEDS runs, or the simulation budget is spent
+
+Seeds are taken in the same order for every candidate, so any two
+candidates are always compared on common random numbers.
+"""
+
+import math
+
+import numpy as np
+
+from config import ALPHA, RACE_MIN_SEEDS, RACE_SEEDS, RACE_Z
+from eval_timings import fitness, mean_metrics
+from worker_pool import evaluate_replicates, evaluate_runs
+
+
+def _simulated(runs: list) -> int:
+    """Number of metric dicts in runs that needed a simulation (not cached)."""
+    return sum(not m.get("cache_hit") for m in runs)
+
+
+def _interval(fits: list) -> tuple:
+    """(mean, half-width) of the RACE_Z confidence interval of fits."""
+    mean = float(np.mean(fits))
+    if len(fits) < 2:
+        return mean, math.inf
+    return mean, RACE_Z * float(np.std(fits, ddof=1)) / math.sqrt(len(fits))
+
+
+def race(
+    genes_list: list,
+    n_select:   int,
+    budget:     int,
+    cutoff:     float = None,
+    opts:       dict  = None,
+) -> tuple:
+    """
+    Evaluate a batch with adaptive replication.
+
+    Args:
+        genes_list: list of flat gene lists
+        n_select:   how many candidates selection keeps (keep_elitism)
+        budget:     simulations this call may use; the first
+                    RACE_MIN_SEEDS rounds always run, even beyond it
+        cutoff:     fitness a candidate must reach to be selected;
+                    None = derive it from this batch's ranking
+        opts:       evaluation options passed to evaluate_worker
+
+    Returns:
+        (one metrics dict per chromosome averaged over its seeds
+         (mean_metrics), number of simulations used)
+    """
+    runs = evaluate_replicates(genes_list, RACE_SEEDS[:RACE_MIN_SEEDS], opts)
+    used = sum(_simulated(r) for r in runs)
+
+    while True:
+        intervals = [_interval([fitness(m, alpha=ALPHA) for m in r]) for r in runs]
+        level     = cutoff
+        if level is None:
+            if n_select >= len(runs):
+                break
+            means = sorted((mean for mean, _ in intervals), reverse=True)
+            level = (means[n_select - 1] + means[n_select]) / 2
+
+        uncertain = [
+            i for i, (mean, half) in enumerate(intervals)
+            if abs(mean - level) <= half and len(runs[i]) < len(RACE_SEEDS)
+        ]
+        room = budget - used
+        if not uncertain or room <= 0:
+            break
+
+        # Closest to the cutoff (in standard errors) first
+        uncertain.sort(key=lambda i: abs(intervals[i][0] - level) / max(intervals[i][1], 1e-9))
+        uncertain = uncertain[:room]
+        extra     = evaluate_runs(
+            [(genes_list[i], RACE_SEEDS[len(runs[i])]) for i in uncertain], opts
+        )
+        for i, m in zip(uncertain, extra):
+            runs[i].append(m)
+        used += _simulated(extra)
+
+    return [mean_metrics(r, alpha=ALPHA) for r in runs], used
@@ -0,0 +1,195 @@
+"""
+steady_state.py
+Asynchronous steady-state evolution (OPTIMIZER=steady_state).
+
+The generational GA waits for the slowest SUMO run of every generation
+— a gridlocked or heavy candidate keeps the other workers idle. Here
+there is no generation barrier:
+  - the initial (or resumed) population is scored first; once every
+    member is back, whenever a worker becomes free, one new offspring
+    is bred from the current population (ga_ops.py) and dispatched to it
+  - each result is inserted as it arrives, replacing the worst member
+    if it is better (duplicates are never inserted)
+  - the simulation budget matches the GA: GENERATIONS * POP_SIZE
+    evaluations
+
+Logging and checkpoints reuse pygad_optimizer.py: every POP_SIZE
+evaluations count as one "generation" row in ga_history.csv, and the
+population is checkpointed every CHECKPOINT_EVERY evaluations. With
+N_SEEDS > 1 each offspring is dispatched as one task per seed and
+scored on their mean. Racing and screening are generational and do
+not apply here; early abort uses the worst member as the bound, since
+that is what an offspring must beat to be inserted.
+"""
+
+import queue
+import multiprocessing
+
+import numpy as np
+
+from config import (
+    POP_SIZE, GENERATIONS, ALPHA, SEEDS, EARLY_ABORT, ABORT_MARGIN,
+    TRACE_EVERY, CHECKPOINT_EVERY,
+)
+from eval_timings import mean_metrics
+from worker_pool import start_pool, submit, close_pool
+from ga_ops import random_population, make_offspring
+from pygad_optimizer import (
+    N_GENES, gen_stats, results, record_result, log_generation, reset_logs,
+    prepare_simulations, save_checkpoint, load_checkpoint, restore_rngs, finish_run,
+)
+
+MODE = "steady_state"
+
+
+def _abort_bound(pop_fit: list) -> float | None:
+    """Early-abort bound: the worst member of a full population, less ABORT_MARGIN."""
+    if not EARLY_ABORT or len(SEEDS) > 1 or len(pop_fit) < POP_SIZE:
+        return None
+    worst = min(pop_fit)
+    return worst - ABORT_MARGIN * abs(worst)
+
+
+def run_steady_state():
+    """
+    Run the asynchronous steady-state optimizer, with checkpoint/resume.
+
+    A checkpoint stores the population and the number of evaluations
+    done; on resume the members whose results the checkpoint restored
+    rejoin the population directly, any others are re-scored first
+    without counting against the budget.
+    """
+    n_workers = min(POP_SIZE, multiprocessing.cpu_count())
+    budget    = GENERATIONS * POP_SIZE
+    rng       = np.random.default_rng()
+
+    checkpoint = load_checkpoint(MODE)
+    if checkpoint is not None:
+        evaluations = checkpoint["evaluations"]
+        todo        = checkpoint["population"]
+        restore_rngs(checkpoint, {"ops": rng})
+        if evaluations >= budget:
+            print("[Checkpoint] Run already completed. Delete checkpoints/checkpoint.json to start fresh.")
+            return
+        print(f"[Config] Resuming at {evaluations}/{budget} evaluations")
+    else:
+        evaluations = 0
+        todo        = random_population(POP_SIZE, N_GENES, rng).tolist()
+        reset_logs()
+        # Checkpoint the initial population before anything is simulated:
+        # a crash while scoring it resumes the same members and the
+        # journal replays the evaluations already finished
+        save_checkpoint(
+            generation   = 0,
+            population   = todo,
+            best_fitness = float("-inf"),
+            extra        = {"optimizer": MODE, "evaluations": 0},
+            rngs         = {"ops": rng},
+        )
+    print(f"[Config] Steady state — Workers: {n_workers}  Population: {POP_SIZE}  "
+          f"Evaluations: {budget}  Genes: {N_GENES}")
+
+    prepare_simulations()
+    start_pool(n_workers)
+
+    pop_genes, pop_fit, pop_metrics = [], [], []
+    for genes in [g for g in todo if tuple(g) in results]:
+        todo.remove(genes)
+        pop_genes.append(genes)
+        pop_fit.append(results[tuple(genes)][0])
+        pop_metrics.append(results[tuple(genes)][1])
+    initial_counts = evaluations == 0   # fixed before evaluations moves
+
+    pending   = {}             # candidate id -> genes, per-seed runs, counts
+    done      = queue.Queue()  # (task idx, metrics) or exception, from the pool
+    next_id   = 0
+    in_flight = 0              # tasks submitted and not yet returned
+    n_seeds   = len(SEEDS)
+
+    def dispatch():
+        """Submit the next initial/resumed chromosome, or a new offspring."""
+        nonlocal next_id, in_flight
+        initial = bool(todo)
+        if initial:
+            # The initial population counts; members re-scored after a
+            # later checkpoint were already counted before it
+            genes, counts = [int(g) for g in todo.pop(0)], initial_counts
+        else:
+            genes  = make_offspring(np.array(pop_genes), np.array(pop_fit), rng).tolist()
+            counts = True
+        cid, next_id = next_id, next_id + 1
+        pending[cid] = {"genes": genes, "runs": [None] * n_seeds, "left": n_seeds,
+                        "counts": counts, "initial": initial}
+        opts = {"abort_below": _abort_bound(pop_fit), "trace": TRACE_EVERY}
+        for k, seed in enumerate(SEEDS):
+            submit(cid * n_seeds + k, genes, {**opts, "seed": seed}, done.put, done.put)
+            in_flight += 1
+
+    def fill():
+        """
+        Keep every worker busy while budget remains. Breeding waits until
+        the whole initial (or resumed) population is back, so no offspring
+        comes from a partial parent pool.
+        """
+        while in_flight < n_workers:
+            if todo:
+                dispatch()
+            elif any(c["initial"] for c in pending.values()):
+                return
+            elif evaluations + sum(c["counts"] for c in pending.values()) < budget:
+                dispatch()
+            else:
+                return
+
+    try:
+        fill()
+        while pending:
+            item = done.get()
+            if isinstance(item, BaseException):
+                raise item
+            idx, m     = item
+            in_flight -= 1
+            cid, k     = divmod(idx, n_seeds)
+            cand       = pending[cid]
+            cand["runs"][k] = m
+            cand["left"]   -= 1
+            if cand["left"]:
+                continue
+            del pending[cid]
+
+            genes  = cand["genes"]
+            merged = mean_metrics(cand["runs"], alpha=ALPHA)
+            gen_stats["simulations"] += sum(not r.get("cache_hit") for r in cand["runs"])
+            f = record_result(genes, merged)
+
+            # Steady-state replacement: fill up, then replace the worst
+            if genes not in pop_genes:
+                if len(pop_genes) < POP_SIZE:
+                    pop_genes.append(genes)
+                    pop_fit.append(f)
+                    pop_metrics.append(merged)
+                else:
+                    worst = int(np.argmin(pop_fit))
+                    if f > pop_fit[worst]:
+                        pop_genes[worst], pop_fit[worst], pop_metrics[worst] = genes, f, merged
+
+            if cand["counts"]:
+                evaluations += 1
+                best = int(np.argmax(pop_fit))
+                if evaluations % POP_SIZE == 0:
+                    log_generation(evaluations // POP_SIZE, pop_genes[best],
+                                   pop_fit[best], pop_metrics[best])
+                if evaluations % CHECKPOINT_EVERY == 0:
+                    save_checkpoint(
+                        generation   = evaluations // POP_SIZE,
+                        population   = pop_genes,
+                        best_fitness = pop_fit[best],
+                        extra        = {"optimizer": MODE, "evaluations": evaluations},
+                        rngs         = {"ops": rng},
+                    )
+            fill()
+    finally:
+        close_pool()
+
+    best = int(np.argmax(pop_fit))
+    finish_run(pop_genes[best], pop_fit[best])
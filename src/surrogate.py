@@ -0,0 +1,111 @@
+"""
+surrogate.py
+Gaussian-process surrogate of the fitness landscape (NumPy only).
+
+A simulation takes minutes; a GP prediction over the chromosome takes
+microseconds. The GA uses it (SURROGATE=1) to decide which offspring
+are worth simulating:
+  - fit() trains on every fully simulated (genes, fitness) pair
+  - predict() returns mean and standard deviation for new chromosomes
+  - select() keeps the best-predicted candidates plus a share of the
+    most uncertain ones, so the model keeps learning where it is weak
+  - rank_correlation() measures how well predictions ranked the
+    candidates that were then simulated (reported per generation)
+
+Model: zero-mean GP on genes scaled to [0, 1] and standardized fitness,
+squared-exponential kernel with unit signal variance and fixed noise.
+The length scale is picked from a small grid by log marginal
+likelihood on every fit — training sets stay small (SURROGATE_MAX_TRAIN)
+so an O(n^3) Cholesky per fit is negligible next to one simulation.
+"""
+
+import math
+
+import numpy as np
+
+from config import GREEN_MIN, GREEN_MAX
+
+NOISE         = 1e-2                       # noise variance (standardized units)
+LENGTH_SCALES = (0.1, 0.2, 0.5, 1.0, 2.0)  # times sqrt(n_genes)
+
+
+def _scale(genes) -> np.ndarray:
+    """Genes to [0, 1]."""
+    return (np.asarray(genes, dtype=float) - GREEN_MIN) / (GREEN_MAX - GREEN_MIN)
+
+
+def _kernel(a: np.ndarray, b: np.ndarray, ls: float) -> np.ndarray:
+    """Squared-exponential kernel matrix between the rows of a and b."""
+    sq = (a * a).sum(1)[:, None] + (b * b).sum(1)[None, :] - 2 * a @ b.T
+    return np.exp(-0.5 * np.maximum(sq, 0.0) / ls ** 2)
+
+
+def fit(genes_list: list, fitness: list) -> dict:
+    """
+    Train the surrogate.
+
+    Args:
+        genes_list: evaluated chromosomes
+        fitness:    their simulated fitness
+
+    Returns:
+        model dict for predict()
+    """
+    X      = _scale(genes_list)
+    y      = np.asarray(fitness, dtype=float)
+    y_mean = y.mean()
+    y_std  = y.std() or 1.0
+    z      = (y - y_mean) / y_std
+
+    best = None
+    for factor in LENGTH_SCALES:
+        ls = factor * math.sqrt(X.shape[1])
+        L  = np.linalg.cholesky(_kernel(X, X, ls) + NOISE * np.eye(len(X)))
+        alpha = np.linalg.solve(L.T, np.linalg.solve(L, z))
+        # log marginal likelihood, up to a constant
+        lml = -0.5 * z @ alpha - np.log(np.diag(L)).sum()
+        if best is None or lml > best[0]:
+            best = (lml, ls, L, alpha)
+
+    _, ls, L, alpha = best
+    return {"X": X, "L": L, "alpha": alpha, "ls": ls, "y_mean": y_mean, "y_std": y_std}
+
+
+def predict(model: dict, genes_list: list) -> tuple:
+    """
+    Predicted fitness for each chromosome.
+
+    Returns:
+        (mean, std) arrays in fitness units
+    """
+    Xs   = _scale(genes_list)
+    Ks   = _kernel(Xs, model["X"], model["ls"])
+    mean = Ks @ model["alpha"]
+    v    = np.linalg.solve(model["L"], Ks.T)
+    var  = np.maximum(1.0 - (v * v).sum(0), 0.0)
+    return (model["y_mean"] + model["y_std"] * mean,
+            model["y_std"] * np.sqrt(var))
+
+
+def select(mean: np.ndarray, std: np.ndarray, n: int, explore: float) -> list:
+    """
+    Indices of n candidates to simulate: round(explore * n) with the
+    largest predictive std, the rest with the highest predicted mean.
+    """
+    n_explore = min(round(explore * n), n)
+    chosen    = list(np.argsort(-mean)[:n - n_explore])
+    for i in np.argsort(-std):
+        if len(chosen) == n:
+            break
+        if i not in chosen:
+            chosen.append(i)
+    return [int(i) for i in chosen]
+
+
+def rank_correlation(predicted: list, actual: list) -> float:
+    """Spearman rank correlation (no tie correction); 0 for < 3 pairs."""
+    if len(predicted) < 3:
+        return 0.0
+    rp = np.argsort(np.argsort(predicted))
+    ra = np.argsort(np.argsort(actual))
+    return float(np.corrcoef(rp, ra)[0, 1])
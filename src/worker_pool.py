@@ -0,0 +1,253 @@
+"""
+worker_pool.py
+Long-lived pool of SUMO worker processes.
+
+PyGAD's parallel_processing builds a new process pool for every
+generation, so every fitness call pays for a fresh `sumo` process:
+startup, net-file parsing and route loading. This pool is started once
+per run instead. Each worker keeps one SUMO simulation open for its
+whole lifetime and resets it between candidates with load(), so only
+the simulation itself is paid per candidate.
+
+Results come back over the pool's result pipe, not through files:
+each worker sends (index, metrics) pairs, one pickled message per chunk
+of tasks, and the main process consumes them as chunks complete.
+
+Usage (main process only):
+    start_pool(n_workers)
+    results = evaluate_population([genes_0, genes_1, ...])
+    for idx, metrics in iter_results([genes_0, genes_1, ...]):
+        ...
+    close_pool()
+
+With BROKER=1, start_pool() starts the TCP broker instead (broker.py)
+and every call below runs its tasks on remote agents; the API and
+result order are unchanged.
+
+Once the optimizer has started the journal (journal.py), tasks already
+in it are answered without being dispatched, and every new result is
+appended to it as soon as it arrives.
+"""
+
+import multiprocessing
+from multiprocessing.util import Finalize
+
+from config import PERSISTENT_WORKERS, BROKER
+from eval_timings import evaluate_worker, shutdown_sumo
+from ports import lease_port, release_all
+import journal
+
+# Pool handle and size (main process)
+_pool      = None
+_n_workers = 0
+_broker    = None   # broker module while BROKER=1 routes tasks to agents
+
+# Tasks are sent (and their results returned) in chunks: at least this
+# many chunks per worker, so large batches cost few messages while the
+# tail of a batch still balances across workers
+CHUNKS_PER_WORKER = 4
+
+# Per-worker state (worker processes)
+# Each worker leases one TraCI port for its whole lifetime so its
+# persistent connection label never changes between candidates.
+_worker_port = None
+
+
+# ============================================================
+# WORKER SIDE
+# ============================================================
+
+def _init_worker():
+    """Pool initializer: lease a port and arrange SUMO shutdown on exit."""
+    global _worker_port
+    _worker_port = lease_port()
+    # Pool workers skip atexit handlers; multiprocessing finalizers
+    # still run when the pool shuts a worker down cleanly. The lease
+    # is dropped by the OS if the worker dies without them.
+    Finalize(None, release_all, exitpriority=5)
+    Finalize(None, shutdown_sumo, exitpriority=10)
+
+
+def _run_task(task: tuple) -> tuple:
+    """Evaluate one (sol_idx, genes, opts) task; return (sol_idx, metrics)."""
+    sol_idx, genes, opts = task
+    opts = dict(opts or {})
+    opts.setdefault("port", _worker_port)
+    opts.setdefault("persistent", PERSISTENT_WORKERS)
+    return sol_idx, evaluate_worker((sol_idx, genes, opts))
+
+
+# ============================================================
+# MAIN-PROCESS API
+# ============================================================
+
+def start_pool(n_workers: int, use_broker: bool = BROKER):
+    """
+    Start n_workers long-lived worker processes (no-op if running).
+
+    use_broker: start the distributed broker instead; n_workers is then
+    ignored — capacity is the sum of the connected agents' slots.
+    Agents pass False to evaluate on their own local pool.
+    """
+    global _pool, _n_workers, _broker
+    if _pool is not None or _broker is not None:
+        return
+    if use_broker:
+        import broker
+        broker.start_broker()
+        _broker = broker
+        return
+
+    _pool = multiprocessing.Pool(n_workers, initializer=_init_worker)
+    _n_workers = n_workers
+
+
+def iter_results(genes_list: list, opts: dict = None):
+    """
+    Evaluate every chromosome in genes_list on the pool, yielding
+    results in completion order.
+
+    Args:
+        genes_list: list of flat gene lists
+        opts:       evaluation options passed to evaluate_worker
+
+    Yields:
+        (index into genes_list, metrics dict)
+    """
+    tasks = [(idx, list(genes), opts) for idx, genes in enumerate(genes_list)]
+    yield from _iter_tasks(tasks)
+
+
+def _iter_tasks(tasks: list):
+    """Run (idx, genes, opts) tasks on the pool; yield (idx, metrics) as they finish."""
+    todo = []
+    for idx, genes, opts in tasks:
+        metrics = journal.lookup(genes, opts)
+        if metrics is None:
+            todo.append((idx, genes, opts))
+        else:
+            yield idx, metrics
+    if not todo:
+        return
+
+    by_idx = {task[0]: task for task in todo}
+    for idx, metrics in _dispatch(todo):
+        if not metrics.get("cache_hit"):
+            _, genes, opts = by_idx[idx]
+            journal.append(genes, opts, metrics)
+        yield idx, metrics
+
+
+def _dispatch(tasks: list):
+    """Send tasks to the broker or the pool; yield (idx, metrics) as they finish."""
+    if _broker is not None:
+        yield from _broker.iter_tasks(tasks)
+        return
+    if _pool is None:
+        raise RuntimeError("Worker pool not started — call start_pool() first.")
+    chunksize = max(1, len(tasks) // (CHUNKS_PER_WORKER * _n_workers))
+    yield from _pool.imap_unordered(_run_task, tasks, chunksize=chunksize)
+
+
+def evaluate_population(genes_list: list, opts: dict = None) -> list:
+    """
+    Evaluate every chromosome in genes_list on the pool.
+
+    Args:
+        genes_list: list of flat gene lists
+        opts:       evaluation options passed to evaluate_worker
+
+    Returns:
+        list of metric dicts, in the same order as genes_list
+    """
+    results = [None] * len(genes_list)
+    for idx, metrics in iter_results(genes_list, opts):
+        results[idx] = metrics
+    return results
+
+
+def submit(idx: int, genes: list, opts: dict, on_done, on_error):
+    """
+    Dispatch one task without waiting for it (asynchronous optimizers).
+
+    on_done((idx, metrics)) or on_error(exception) is called from the
+    pool's result thread when the task finishes — hand the result to
+    the main thread (e.g. through a queue.Queue) rather than doing
+    work there.
+    """
+    metrics = journal.lookup(genes, opts)
+    if metrics is not None:
+        on_done((idx, metrics))
+        return
+
+    def done(item):
+        if not item[1].get("cache_hit"):
+            journal.append(genes, opts, item[1])
+        on_done(item)
+
+    if _broker is not None:
+        _broker.submit(idx, genes, opts, done, on_error)
+        return
+    if _pool is None:
+        raise RuntimeError("Worker pool not started — call start_pool() first.")
+    _pool.apply_async(
+        _run_task, ((idx, list(genes), opts),),
+        callback=done, error_callback=on_error,
+    )
+
+
+def evaluate_runs(runs: list, opts: dict = None) -> list:
+    """
+    Evaluate (genes, seed) pairs on the pool, one task each.
+
+    Args:
+        runs: list of (flat gene list, SUMO seed)
+        opts: evaluation options passed to evaluate_worker
+
+    Returns:
+        list of metric dicts, in the same order as runs
+    """
+    tasks   = [
+        (idx, list(genes), {**(opts or {}), "seed": seed})
+        for idx, (genes, seed) in enumerate(runs)
+    ]
+    results = [None] * len(tasks)
+    for idx, metrics in _iter_tasks(tasks):
+        results[idx] = metrics
+    return results
+
+
+def evaluate_replicates(genes_list: list, seeds: list, opts: dict = None) -> list:
+    """
+    Evaluate every chromosome under every seed. Each (chromosome, seed)
+    pair is an independent task, so replications spread over all
+    workers instead of running back to back.
+
+    Args:
+        genes_list: list of flat gene lists
+        seeds:      SUMO seeds shared by every chromosome
+        opts:       evaluation options passed to evaluate_worker
+
+    Returns:
+        one list per chromosome of metric dicts, in the order of seeds
+    """
+    n_seeds = len(seeds)
+    results = evaluate_runs(
+        [(genes, seed) for genes in genes_list for seed in seeds], opts
+    )
+    return [results[c * n_seeds:(c + 1) * n_seeds] for c in range(len(genes_list))]
+
+
+def close_pool():
+    """Shut the workers down, closing their SUMO simulations."""
+    global _pool, _n_workers, _broker
+    if _broker is not None:
+        _broker.stop_broker()
+        _broker = None
+        return
+    if _pool is None:
+        return
+    _pool.close()
+    _pool.join()
+    _pool      = None
+    _n_workers = 0